@@ -1,24 +1,17 @@
 from abc import get_cache_token
+import sys
 from graphics import *
-from enum import Enum
 from time import sleep
+from chess.position import Color, ChessPiece, Position, squareIndex, moveFrom, moveTo, movePromotion, QUEEN
+from chess.search import Searcher
+from chess.fen import STARTING_FEN, parseFen, toFen
+from chess.book import OpeningBook
+from chess.compact import snapshot, restore
+from chess.gamelog import GameLogWriter, UNKNOWN_RESULT, WHITE_WINS, BLACK_WINS, DRAWN
 
 FILE = ["a", "b", "c", "d", "e", "f", "g", "h"]
 ASSETLOCATION = "Assets/"
-
-class Color(Enum):
-    White = 0
-    Black = 1
-class ChessPiece(Enum):
-    Pawn = 1
-    Knight = 2
-    Bishop = 3
-    Rook = 4
-    Queen = 5
-    King = 6
-class PawnMoveDirection(Enum):
-    Forward = 1
-    Backward = -1
+ARCHIVE = "games.cgl"
 
 def makeRectangle(x1, y1, x2, y2, width):
     rect = Rectangle(Point(x1, y1), Point(x2, y2))
@@ -43,6 +36,8 @@ class SquareHasNoPiece(Exception): pass
 class InvalidPieceName(Exception): pass
 
 class Piece():
+    __slots__ = ("color", "chessPiece", "img")
+
     def __init__(self, color: Color, piece: ChessPiece, img):
         self.color = color
         self.chessPiece = piece
@@ -64,18 +59,20 @@ class Piece():
         return self.color == Color.White
 
 class Square:
+    __slots__ = ("color", "name", "file", "rank", "index", "img", "centerPoint", "piece", "window", "previewImg")
+
     def __init__(self, color: Color, name: str, img: Image):
         self.color = color
         self.name = name
         self.file = self.name[0]
         self.rank = int(self.name[1]) 
+        self.index = squareIndex(FILE.index(self.file), self.rank - 1)
         self.img = img
         self.centerPoint = Point((img.getP1().getX() + img.getP2().getX()) / 2,
             (img.getP1().getY() + img.getP2().getY()) / 2)
         self.piece = None
         self.window = None
         self.previewImg = None
-        self.canCastle = False
     
     def drawSquare(self, window: GraphWin) -> None:
         self.window = window
@@ -100,8 +97,6 @@ class Square:
             self.setPiece(ChessPiece.King, pieceColor)
         else : raise InvalidPieceName
 
-        self.canCastle = self.piece.chessPiece == ChessPiece.King or self.piece.chessPiece == ChessPiece.Rook
-
     def setPiece(self, piece: ChessPiece, pieceColor: Color) -> None:
         if self.piece != None: self.removePiece()
 
@@ -110,12 +105,16 @@ class Square:
 
         self._drawPiece()
 
-    def previewPiece(self, piece: Piece) -> None:
-        self.piece = piece
-
     def getPiece(self) -> Piece:
         return self.piece
 
+    def transferPiece(self, target: "Square") -> None:
+        if not target.isEmpty(): target.removePiece()
+        self.piece.img.move(target.centerPoint.getX() - self.centerPoint.getX(),
+            target.centerPoint.getY() - self.centerPoint.getY())
+        target.piece = self.piece
+        self.piece = None
+
     def _drawPiece(self) -> None:
         self.piece.draw(self.window)
 
@@ -166,6 +165,8 @@ class Chess:
         self.possibleMoves = []
         self.window = window
         self.squareSize = (self.height - self.borderOffset) / 8
+        self.position = Position()
+        self.startSnapshot = snapshot(self.position)
 
         if self.height <= 100:
             raise WindowHeightTooSmall
@@ -213,50 +214,82 @@ class Chess:
 
         square = self.board[file][rank - 1]
         square._setPiece(pieceName)
+        self.position.setPiece(square.index, square.piece.chessPiece.value | square.piece.color.value << 3)
 
     def setUpPieces(self) -> None:
-        self._addPiece("WhiteRook", "a1")
-        self._addPiece("WhiteRook", "h1")
-        self._addPiece("WhiteKnight", "b1")
-        self._addPiece("WhiteKnight", "g1")
-        self._addPiece("WhiteBishop", "c1")
-        self._addPiece("WhiteBishop", "f1")
-        self._addPiece("WhiteQueen", "d1")
-        self._addPiece("WhiteKing", "e1")
+        self.loadFen(STARTING_FEN)
 
-        for file in range(8):
-            self._addPiece("WhitePawn", FILE[file] + "2")
+    def loadFen(self, fen: str) -> None:
+        self.position = parseFen(fen)
+        self.startSnapshot = snapshot(self.position)
+        self._syncPieces()
 
-        self._addPiece("BlackRook", "a8")
-        self._addPiece("BlackRook", "h8")
-        self._addPiece("BlackKnight", "b8")
-        self._addPiece("BlackKnight", "g8")
-        self._addPiece("BlackBishop", "c8")
-        self._addPiece("BlackBishop", "f8")
-        self._addPiece("BlackQueen", "d8")
-        self._addPiece("BlackKing", "e8")
+    def toFen(self) -> str:
+        return toFen(self.position)
 
-        for file in range(8):
-            self._addPiece("BlackPawn", FILE[file] + "7")
-    
-    def movePiece(self, square1: Square, square2: Square) -> None:
-        if square1.piece == ChessPiece.King and square1.canCastle:
-            difference = FILE.index(square1.file) - FILE.index(square2.file)
-            if abs(difference) > 1:
-                rookMoveDistance = 1 if difference > 0 else -1
-                rookSquare = self.board["a" if difference > 0 else "h"][square1.rank - 1]
-                newRooksquare = self.board[FILE[FILE.index(square2.file) + rookMoveDistance]][square2.rank - 1]
-                self.movePiece(rookSquare, newRooksquare)
-
-        square2.setPiece(square1.piece.chessPiece, square1.piece.color)
-        square1.removePiece()
-        square1.canCastle = False
+    def snapshot(self) -> bytes:
+        return snapshot(self.position)
+
+    def restoreSnapshot(self, data: bytes) -> None:
+        self.position = restore(data)
+        self.startSnapshot = data
+        self._syncPieces()
+
+    def archiveGame(self, path: str, result: int = UNKNOWN_RESULT) -> None:
+        writer = GameLogWriter(path)
+        try:
+            writer.addGame(self.startSnapshot, self.position.moveList(), result)
+        finally:
+            writer.close()
+
+    def _result(self) -> int:
+        if self.position.isCheckmate():
+            return BLACK_WINS if self.position.sideToMove == Color.White.value else WHITE_WINS
+        return DRAWN if self.position.isStalemate() else UNKNOWN_RESULT
+
+    def _squareAt(self, index: int) -> Square:
+        return self.board[FILE[index & 7]][index >> 3]
+
+    def _syncPieces(self) -> None:
+        for index in range(64):
+            square = self._squareAt(index)
+            piece = self.position.pieceAt(index)
+            if piece == 0:
+                if not square.isEmpty(): square.removePiece()
+                continue
+
+            chessPiece, color = ChessPiece(piece & 7), Color(piece >> 3)
+            if square.isEmpty() or square.piece.chessPiece != chessPiece or square.piece.color != color:
+                square.setPiece(chessPiece, color)
+
+    def movePiece(self, square1: Square, square2: Square, promotion: int = QUEEN) -> None:
+        move = self.position.findMove(square1.index, square2.index, promotion)
+        self.position.makeMove(move)
+        square1.transferPiece(square2)
+        self._syncPieces()
    
-    def makeMove(self) -> None:
+    def makeMove(self, computerColor: Color = None, moveTime: float = 2.0, book: OpeningBook = None, archive: str = ARCHIVE) -> None:
+        # plays until the game is over, then appends it to the archive unless archive is None
+        self._playGame(computerColor, moveTime, book)
+        if archive is not None:
+            self.archiveGame(archive, self._result())
+
+    def _playGame(self, computerColor: Color, moveTime: float, book: OpeningBook) -> None:
         lastSelectedSquare = None
         selectedSquare = None
-        moveColor = Color.White
+        moveColor = Color(self.position.sideToMove)
+        searcher = Searcher() if computerColor is not None else None
         while(True):
+            if moveColor == computerColor:
+                move = book.probe(self.position) if book is not None else None
+                if move is None:
+                    move, score, depth = searcher.search(self.position, moveTime)
+                self.movePiece(self._squareAt(moveFrom(move)), self._squareAt(moveTo(move)), movePromotion(move))
+                moveColor = swapColor(moveColor)
+                selectedSquare = None
+                if self._isGameOver(moveColor): break
+                continue
+
             click = self.window.getMouse()
             x, y = self.getClickSquare(click)
             lastSelectedSquare = selectedSquare
@@ -268,15 +301,8 @@ class Chess:
                     self.movePiece(lastSelectedSquare, selectedSquare)
                     self.undrawPreviews()
                     moveColor = swapColor(moveColor)
-                    kingSquare = self.inCheck(moveColor)
-                    if kingSquare is not None :
-                        kingSquare.flashSquare(0.5, "red")
-
-                        if self.checkForcheckmate(moveColor):
-                            print(moveColor.name, "is in checkmate!")
-                            break
-
-                    self.undrawPreviews
+                    if self._isGameOver(moveColor): break
+                    if moveColor == computerColor: continue
                 else: kingInCheck.flashSquare(0.5, "red")
                 
             try:
@@ -293,6 +319,18 @@ class Chess:
             legalMoves = self.getAllLegalMoves(x, y)
             self.drawPreviews(legalMoves)
       
+    def _isGameOver(self, moveColor: Color) -> bool:
+        kingSquare = self.inCheck(moveColor)
+        if kingSquare is not None:
+            kingSquare.flashSquare(0.5, "red")
+            if self.checkForcheckmate(moveColor):
+                print(moveColor.name, "is in checkmate!")
+                return True
+        elif self.position.isStalemate():
+            print(moveColor.name, "is in stalemate!")
+            return True
+        return False
+
     def getClickSquare(self, click: Point) -> tuple:
         clickX = click.getX() - self.borderOffset
         clickY = click.getY() - self.borderOffset
@@ -307,331 +345,13 @@ class Chess:
 
     def getAllLegalMoves(self, *coords: tuple) -> list:
         file, rank = coords
-        currentSquare = self.board[FILE[file]][rank]
-        currentPiece = currentSquare.piece
-        if currentSquare.isEmpty(): return []
-
-        legalMoves = []
-        if currentPiece == ChessPiece.Pawn:
-            moveDirection = PawnMoveDirection.Forward if currentPiece.isWhite() else PawnMoveDirection.Backward
-            if (currentPiece.isWhite() and rank == 1) or (not currentPiece.isWhite() and rank == 6):
-                maxDistance = 2
-            else: maxDistance = 1
-
-            for change in range(1, 1 + maxDistance):
-                
-                try:     
-                    possibleMove = self.board[FILE[file]][rank + change * moveDirection.value]
-                    if possibleMove.isEmpty():
-                        legalMoves.append(possibleMove) 
-                    else: 
-                        break
-                except:
-                    pass
-
-            try:     
-                possibleMove = self.board[FILE[file + 1]][rank + 1 * moveDirection.value]
-                if currentPiece.color != possibleMove.piece.color:
-                    legalMoves.append(possibleMove) 
-            except:
-                pass
-
-            try:     
-                possibleMove = self.board[FILE[file - 1]][rank + 1 * moveDirection.value]
-                if currentPiece.color != possibleMove.piece.color:
-                    legalMoves.append(possibleMove) 
-            except:
-                pass
-
-        elif currentPiece == ChessPiece.Knight:
-            KnightMoves = [[1, 2], [-1 , 2] ,[1, -2], [-1, -2], [-2, 1], [-2, -1], [2, 1], [2, -1]]
-            
-            for change in KnightMoves:
-                if file + change[0] < 0 or rank + change[1] < 0: continue
-                try:     
-                    possibleMove = self.board[FILE[file + change[0]]][rank + change[1]]
-                    if possibleMove.isEmpty():
-                        legalMoves.append(possibleMove) 
-                    elif currentPiece.color != possibleMove.piece.color:
-                        legalMoves.append(possibleMove) 
-                except:
-                    pass
-    
-        elif currentPiece == ChessPiece.Bishop:
-            #++
-            for change in range(1, 8):
-                try:     
-                    possibleMove = self.board[FILE[file + change]][rank + change]
-                    if possibleMove.isEmpty():
-                        legalMoves.append(possibleMove)
-                    elif currentPiece.color != possibleMove.piece.color:
-                        legalMoves.append(possibleMove) 
-                        break
-                    else: 
-                        break
-                except:
-                    pass
-            
-            #+-
-            for change in range(1, 8):
-                if file - change < 0: continue
-                try:     
-                    possibleMove = self.board[FILE[file - change]][rank + change]
-                    if possibleMove.isEmpty():
-                        legalMoves.append(possibleMove) 
-                    elif currentPiece.color != possibleMove.piece.color:
-                        legalMoves.append(possibleMove) 
-                        break
-                    else: 
-                        break
-                except:
-                    pass
-
-            #-+
-            for change in range(1, 8):
-                if rank - change < 0: continue
-                try:     
-                    possibleMove = self.board[FILE[file + change]][rank - change]
-                    if possibleMove.isEmpty():
-                        legalMoves.append(possibleMove) 
-                    elif currentPiece.color != possibleMove.piece.color:
-                        legalMoves.append(possibleMove) 
-                        break
-                    else: 
-                        break
-                except:
-                    pass
-            
-            #--
-            for change in range(1, 8):
-                if file - change < 0 or rank - change < 0: continue
-                try:     
-                    possibleMove = self.board[FILE[file - change]][rank - change]
-                    if possibleMove.isEmpty():
-                        legalMoves.append(possibleMove) 
-                    elif currentPiece.color != possibleMove.piece.color:
-                        legalMoves.append(possibleMove) 
-                        break
-                    else: 
-                        break
-                except:
-                    pass
-        
-        elif currentPiece == ChessPiece.Rook:
-            #+
-            for change in range(1, 8):
-                try:     
-                    possibleMove = self.board[FILE[file]][rank + change]
-                    if possibleMove.isEmpty():
-                        legalMoves.append(possibleMove)
-                    elif currentPiece.color != possibleMove.piece.color:
-                        legalMoves.append(possibleMove) 
-                        break
-                    else: 
-                        break
-                except:
-                    pass
-            
-            #-
-            for change in range(1, 8):
-                if rank - change < 0: continue
-                try:     
-                    possibleMove = self.board[FILE[file]][rank - change]
-                    if possibleMove.isEmpty():
-                        legalMoves.append(possibleMove) 
-                    elif currentPiece.color != possibleMove.piece.color:
-                        legalMoves.append(possibleMove) 
-                        break
-                    else: 
-                        break
-                except:
-                    pass
-
-            # +
-            for change in range(1, 8):
-                try:     
-                    possibleMove = self.board[FILE[file + change]][rank]
-                    if possibleMove.isEmpty():
-                        legalMoves.append(possibleMove) 
-                    elif currentPiece.color != possibleMove.piece.color:
-                        legalMoves.append(possibleMove) 
-                        break
-                    else: 
-                        break
-                except:
-                    pass
-            
-            # -
-            for change in range(1, 8):
-                if file - change < 0: continue
-                try:     
-                    possibleMove = self.board[FILE[file - change]][rank]
-                    if possibleMove.isEmpty():
-                        legalMoves.append(possibleMove) 
-                    elif currentPiece.color != possibleMove.piece.color:
-                        legalMoves.append(possibleMove) 
-                        break
-                    else: 
-                        break
-                except:
-                    pass
-
-        elif currentPiece == ChessPiece.Queen:
-            #++
-            for change in range(1, 8):
-                try:     
-                    possibleMove = self.board[FILE[file + change]][rank + change]
-                    if possibleMove.isEmpty():
-                        legalMoves.append(possibleMove)
-                    elif currentPiece.color != possibleMove.piece.color:
-                        legalMoves.append(possibleMove) 
-                        break
-                    else: 
-                        break
-                except:
-                    pass
-            
-            #+-
-            for change in range(1, 8):
-                if file - change < 0: continue
-                try:     
-                    possibleMove = self.board[FILE[file - change]][rank + change]
-                    if possibleMove.isEmpty():
-                        legalMoves.append(possibleMove) 
-                    elif currentPiece.color != possibleMove.piece.color:
-                        legalMoves.append(possibleMove) 
-                        break
-                    else: 
-                        break
-                except:
-                    pass
-
-            #-+
-            for change in range(1, 8):
-                if rank - change < 0: continue
-                try:     
-                    possibleMove = self.board[FILE[file + change]][rank - change]
-                    if possibleMove.isEmpty():
-                        legalMoves.append(possibleMove) 
-                    elif currentPiece.color != possibleMove.piece.color:
-                        legalMoves.append(possibleMove) 
-                        break
-                    else: 
-                        break
-                except:
-                    pass
-            
-            #--
-            for change in range(1, 8):
-                if file - change < 0 or rank - change < 0: continue
-                try:     
-                    possibleMove = self.board[FILE[file - change]][rank - change]
-                    if possibleMove.isEmpty():
-                        legalMoves.append(possibleMove) 
-                    elif currentPiece.color != possibleMove.piece.color:
-                        legalMoves.append(possibleMove) 
-                        break
-                    else: 
-                        break
-                except:
-                    pass
-
-            #+
-            for change in range(1, 8):
-                try:     
-                    possibleMove = self.board[FILE[file]][rank + change]
-                    if possibleMove.isEmpty():
-                        legalMoves.append(possibleMove)
-                    elif currentPiece.color != possibleMove.piece.color:
-                        legalMoves.append(possibleMove) 
-                        break
-                    else: 
-                        break
-                except:
-                    pass
-            
-            #-
-            for change in range(1, 8):
-                if rank - change < 0: continue
-                try:     
-                    possibleMove = self.board[FILE[file]][rank - change]
-                    if possibleMove.isEmpty():
-                        legalMoves.append(possibleMove) 
-                    elif currentPiece.color != possibleMove.piece.color:
-                        legalMoves.append(possibleMove) 
-                        break
-                    else: 
-                        break
-                except:
-                    pass
-
-            # +
-            for change in range(1, 8):
-                try:     
-                    possibleMove = self.board[FILE[file + change]][rank]
-                    if possibleMove.isEmpty():
-                        legalMoves.append(possibleMove) 
-                    elif currentPiece.color != possibleMove.piece.color:
-                        legalMoves.append(possibleMove) 
-                        break
-                    else: 
-                        break
-                except:
-                    pass
-            
-            # -
-            for change in range(1, 8):
-                if file - change < 0: continue
-                try:     
-                    possibleMove = self.board[FILE[file - change]][rank]
-                    if possibleMove.isEmpty():
-                        legalMoves.append(possibleMove) 
-                    elif currentPiece.color != possibleMove.piece.color:
-                        legalMoves.append(possibleMove) 
-                        break
-                    else: 
-                        break
-                except:
-                    pass
-
-        elif currentPiece == ChessPiece.King:
-            for xMove in range(-1, 2):
-                for yMove in range(-1, 2):
-                    if (file + xMove < 0) or (rank + yMove < 0) or (xMove == 0 and yMove == 0): continue
-                    try:     
-                        possibleMove = self.board[FILE[file + xMove]][rank + yMove]
-                        if possibleMove.isEmpty():
-                            legalMoves.append(possibleMove) 
-                        elif currentPiece.color != possibleMove.piece.color:
-                            legalMoves.append(possibleMove) 
-                    except: pass
-
-            if currentSquare.canCastle:
-                try:
-                    ARook = self.board["a"][rank]
-                    if ARook.canCastle and (self.board["b"][rank].isEmpty() and self.board["c"][rank].isEmpty() and self.board["d"][rank].isEmpty()):
-                        legalMoves.append(self.board["c"][rank])
-                except: pass
-
-                try:
-                    HRook = self.board["h"][rank]
-                    if HRook.canCastle and (self.board["f"][rank].isEmpty() and self.board["g"][rank].isEmpty()):
-                        legalMoves.append(self.board["g"][rank])
-                except: pass
-
-        return legalMoves
+        moves = self.position.legalMovesFrom(squareIndex(file, rank))
+        return [self._squareAt(target) for target in dict.fromkeys(moveTo(move) for move in moves)]
 
     def isMoveAllowed(self, square1: Square, square2: Square) -> Square:
-        lostPiece = square2.piece
-        self.previewMove(square1, square2)
-        kingSquare = self.inCheck(square2.piece.color)
-        self.previewMove(square2, square1)
-        square2.previewPiece(lostPiece)
-
-        if kingSquare is not None and square1.piece.chessPiece == ChessPiece.King:
-            kingSquare = square1        
-
-        return kingSquare
+        if self.position.findMove(square1.index, square2.index) is not None:
+            return None
+        return self._squareAt(self.position.kingSquare[self.position.sideToMove])
             
     def drawPreviews(self, legalMoves: list) -> None:
         self.possibleMoves = legalMoves
@@ -644,44 +364,13 @@ class Chess:
         
         self.possibleMoves = []
 
-    def previewMove(self, square1: Square, square2: Square):
-        square2.previewPiece(square1.piece)
-        square1.previewPiece(None)
-
     def inCheck(self, colorInCheck: Color) -> Square:
-        checkingColor = swapColor(colorInCheck)
-
-        kingInCheck = None
-        for file in range(0, 8):
-            for rank in range(0, 8):
-                currentSquare = self.board[FILE[file]][rank]
-                try:
-                    if currentSquare.piece.color == checkingColor:
-                        legalMoves = self.getAllLegalMoves(file, rank)
-                        for moveSquare in legalMoves:
-                            if moveSquare.piece == ChessPiece.King:
-                                kingInCheck = moveSquare
-                except:
-                    pass
-
-        return kingInCheck
+        if self.position.kingInCheck(colorInCheck.value):
+            return self._squareAt(self.position.kingSquare[colorInCheck.value])
+        return None
     
     def checkForcheckmate(self, colorInCheck: Color) -> bool:
-        checkingColor = swapColor(colorInCheck)
-
-        for file in range(0, 8):
-            for rank in range(0, 8):
-                square = self.board[FILE[file]][rank]
-                allMoves = self.getAllLegalMoves(file, rank)
-
-                try:
-                    if square.piece.color == colorInCheck:
-                        for move in allMoves:
-                            if self.isMoveAllowed(square, move) is None: return False
-                except:
-                    pass
-
-        return True
+        return self.position.sideToMove == colorInCheck.value and self.position.isCheckmate()
 
     def _clickPrint(self) -> None:
         while(True):
@@ -698,12 +387,15 @@ class Chess:
             cir.setFill("green")
             cir.draw(self.window)
 
-def main():
+def main(computerColor: Color = None, fen: str = STARTING_FEN):
     window = GraphWin("Chess Board", 700, 700)
     chess = Chess(window)
     chess.setUpBoard()
-    chess.setUpPieces()
-    chess.makeMove()
+    chess.loadFen(fen)
+    chess.makeMove(computerColor)
     window.getMouse()
 
-main()
\ No newline at end of file
+if __name__ == "__main__":
+    # python Chess.py [white|black|none] ["<fen>"] lets the computer play that side, from that position
+    computerColor = Color[sys.argv[1].capitalize()] if len(sys.argv) > 1 and sys.argv[1] != "none" else None
+    main(computerColor, sys.argv[2] if len(sys.argv) > 2 else STARTING_FEN)
\ No newline at end of file
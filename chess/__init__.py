@@ -0,0 +1,3 @@
+from chess.constants import *
+from chess.position import *
+from chess.fen import *
@@ -0,0 +1,232 @@
+import sys
+from argparse import ArgumentParser
+from time import perf_counter
+from chess.fen import STARTING_FEN, parseFen, toFen
+from chess.perft import runPerft, runSuite
+from chess.formatsuite import runFormatSuite
+from chess.pgn import runValidation
+from chess.book import OpeningBook, buildBook
+from chess.position import moveToUci
+from chess.search import Searcher, MAX_DEPTH
+from chess.parallel import ParallelSearcher, measureSpeedup
+from chess.compact import CompactPosition, bytesPerPosition, samplePositions
+from chess.gamelog import GameLog, InvalidGameLog, PlyOutOfRange, RESULT_NAMES, writeArchive, pgnGames
+from chess.positionindex import PositionIndex, InvalidPositionIndex, buildPositionIndex
+from chess.tablebase import Tablebase, generateTable, InvalidSignature, WIN, LOSS
+
+def _fenArgument(text: str) -> str:
+    return STARTING_FEN if text == "startpos" else text
+
+def _workerCounts(text: str) -> tuple:
+    return tuple(int(count) for count in text.split(","))
+
+def runSearch(args) -> None:
+    if args.workers > 1:
+        searcher = ParallelSearcher(args.workers, useOrdering=not args.no_ordering, tablebaseDirectory=args.tablebases)
+    else:
+        searcher = Searcher(useOrdering=not args.no_ordering, tablebase=Tablebase(args.tablebases) if args.tablebases else None)
+    maxTime = args.time
+    if maxTime is None and args.depth is None and args.nodes is None:
+        maxTime = 5.0
+    try:
+        move, score, depth = searcher.search(parseFen(args.fen), maxTime, args.depth or MAX_DEPTH, args.nodes)
+    finally:
+        if args.workers > 1: searcher.close()
+    for iteration in searcher.iterations:
+        print("depth %2d  score %6d  nodes %10d  time %7.3fs  pv %s" % (iteration[0], iteration[1], iteration[3], iteration[4], moveToUci(iteration[2])))
+    print("bestmove", moveToUci(move) if move is not None else "(none)")
+
+def runSpeedup(args) -> None:
+    for workers, seconds, nodes, move, speedup in measureSpeedup(parseFen(args.fen), args.depth, args.workers):
+        print("workers %2d  time %8.3fs  nodes %10d  speedup %5.2fx  bestmove %s" % (workers, seconds, nodes, speedup, moveToUci(move)))
+
+def runBookProbe(args) -> None:
+    book = OpeningBook(args.book)
+    try:
+        position = parseFen(args.fen)
+        entries = book.entries(position.key)
+    finally:
+        book.close()
+    for move, weight, learn in entries:
+        print("%-6s  weight %5d" % (moveToUci(move), weight))
+    if not entries:
+        print("(not in book)")
+
+def runGameLogShow(args) -> int:
+    try:
+        log = GameLog(args.archive)
+    except InvalidGameLog:
+        print("not a game archive:", args.archive)
+        return 1
+    try:
+        if not 0 <= args.game < log.count:
+            print("archive has %d games" % log.count)
+            return 1
+        plies, interval, result = log.header(args.game)
+        print("game %d  %d plies  result %s" % (args.game, plies, RESULT_NAMES[result]))
+        try:
+            print(toFen(log.positionAt(args.game, plies if args.ply is None else args.ply)))
+        except PlyOutOfRange:
+            print("ply must be between 0 and %d" % plies)
+            return 1
+    finally:
+        log.close()
+    return 0
+
+def runIndexQuery(args) -> int:
+    try:
+        index = PositionIndex(args.index)
+    except InvalidPositionIndex:
+        print("not a position index:", args.index)
+        return 1
+    try:
+        start = perf_counter()
+        found = index.gamesWith(parseFen(args.fen), args.limit)
+        seconds = perf_counter() - start
+    finally:
+        index.close()
+    for gameId, ply in found:
+        print("game %8d  ply %4d" % (gameId, ply))
+    print("Matches: %d  time: %.3fms" % (len(found), seconds * 1000))
+    return 0
+
+def runFootprint(args) -> None:
+    positions = samplePositions(args.count)
+    compact = [CompactPosition.fromPosition(position) for position in positions]
+    print("Position         %7.0f bytes per position" % bytesPerPosition(positions))
+    print("CompactPosition  %7.0f bytes per position" % bytesPerPosition(compact))
+
+def runTablebaseProbe(args) -> int:
+    tablebase = Tablebase(args.directory)
+    try:
+        result = tablebase.probe(parseFen(args.fen))
+    finally:
+        tablebase.close()
+    if result is None:
+        print("(no table, or an illegal position)")
+        return 1
+    wdl, moves = result
+    if wdl == WIN:
+        print("win, mate in %d" % moves)
+    elif wdl == LOSS:
+        print("loss, mated in %d" % moves)
+    else:
+        print("draw")
+    return 0
+
+def main(argv: list = None) -> int:
+    parser = ArgumentParser(prog="python -m chess")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    perftCommand = commands.add_parser("perft", help="count leaf nodes of the legal move tree")
+    perftCommand.add_argument("fen", type=_fenArgument, help='FEN string, or "startpos"')
+    perftCommand.add_argument("depth", type=int)
+    perftCommand.add_argument("--divide", action="store_true", help="print the node count below each root move")
+
+    suiteCommand = commands.add_parser("perft-suite", help="check the reference positions and report nodes per second")
+    suiteCommand.add_argument("--max-nodes", type=int, default=500000, help="skip depths whose expected count is larger")
+
+    formatCommand = commands.add_parser("format-suite", help="check the on-disk formats against recomputation on random games")
+    formatCommand.add_argument("--games", type=int, default=200)
+    formatCommand.add_argument("--seed", type=int, default=0)
+    formatCommand.add_argument("--no-tablebases", action="store_true", help="skip generating and checking the endgame tables")
+
+    searchCommand = commands.add_parser("search", help="search a position and report nodes needed per depth")
+    searchCommand.add_argument("fen", type=_fenArgument, help='FEN string, or "startpos"')
+    searchCommand.add_argument("--time", type=float, default=None, help="seconds to search")
+    searchCommand.add_argument("--depth", type=int, default=None)
+    searchCommand.add_argument("--nodes", type=int, default=None)
+    searchCommand.add_argument("--no-ordering", action="store_true", help="search moves in generation order")
+    searchCommand.add_argument("--workers", type=int, default=1, help="split root moves across this many processes")
+    searchCommand.add_argument("--tablebases", default=None, help="directory of endgame tables to probe")
+
+    speedupCommand = commands.add_parser("speedup", help="time a fixed-depth parallel search for several pool sizes")
+    speedupCommand.add_argument("fen", type=_fenArgument, help='FEN string, or "startpos"')
+    speedupCommand.add_argument("--depth", type=int, default=5)
+    speedupCommand.add_argument("--workers", type=_workerCounts, default=(1, 2, 4, 8, 16), help="comma-separated pool sizes")
+
+    pgnCommand = commands.add_parser("pgn", help="replay every game of a PGN file and report which are legal")
+    pgnCommand.add_argument("path")
+    pgnCommand.add_argument("--quiet", action="store_true", help="print only the totals")
+    pgnCommand.add_argument("--workers", type=int, default=1, help="validate shards of the file in this many processes")
+
+    buildCommand = commands.add_parser("book-build", help="build an opening book from PGN files")
+    buildCommand.add_argument("out")
+    buildCommand.add_argument("pgn", nargs="+")
+    buildCommand.add_argument("--max-ply", type=int, default=20, help="only book moves from this many plies into each game")
+    buildCommand.add_argument("--min-games", type=int, default=1, help="leave out moves played in fewer games")
+
+    probeCommand = commands.add_parser("book-probe", help="list the book moves for a position")
+    probeCommand.add_argument("book")
+    probeCommand.add_argument("fen", type=_fenArgument, help='FEN string, or "startpos"')
+
+    importCommand = commands.add_parser("gamelog-import", help="append the valid games of PGN files to a binary game archive")
+    importCommand.add_argument("archive")
+    importCommand.add_argument("pgn", nargs="+")
+
+    showCommand = commands.add_parser("gamelog-show", help="print an archived game's position at a ply")
+    showCommand.add_argument("archive")
+    showCommand.add_argument("game", type=int)
+    showCommand.add_argument("--ply", type=int, default=None, help="defaults to the final position")
+
+    indexCommand = commands.add_parser("index-build", help="index every position of a game archive by Zobrist key")
+    indexCommand.add_argument("archive")
+    indexCommand.add_argument("out")
+    indexCommand.add_argument("--max-ply", type=int, default=None, help="only index this many plies into each game")
+
+    queryCommand = commands.add_parser("index-query", help="list the archived games that reached a position")
+    queryCommand.add_argument("index")
+    queryCommand.add_argument("fen", type=_fenArgument, help='FEN string, or "startpos"')
+    queryCommand.add_argument("--limit", type=int, default=None, help="stop after this many matches")
+
+    footprintCommand = commands.add_parser("footprint", help="measure the memory each position representation takes")
+    footprintCommand.add_argument("--count", type=int, default=1000, help="positions to sample from random games")
+
+    generateCommand = commands.add_parser("tablebase-build", help="generate endgame tables, e.g. KQvK KRvKN")
+    generateCommand.add_argument("signatures", nargs="+")
+    generateCommand.add_argument("--dir", dest="directory", default="tablebases")
+
+    tablebaseCommand = commands.add_parser("tablebase-probe", help="look a position up in the endgame tables")
+    tablebaseCommand.add_argument("fen", type=_fenArgument, help='FEN string, or "startpos"')
+    tablebaseCommand.add_argument("--dir", dest="directory", default="tablebases")
+
+    args = parser.parse_args(argv)
+    if args.command == "perft":
+        runPerft(args.fen, args.depth, args.divide)
+    elif args.command == "perft-suite":
+        return 0 if runSuite(args.max_nodes) else 1
+    elif args.command == "format-suite":
+        return 0 if runFormatSuite(args.games, args.seed, not args.no_tablebases) else 1
+    elif args.command == "search":
+        runSearch(args)
+    elif args.command == "speedup":
+        runSpeedup(args)
+    elif args.command == "book-build":
+        print("Entries:", buildBook(args.pgn, args.out, args.max_ply, args.min_games))
+    elif args.command == "book-probe":
+        runBookProbe(args)
+    elif args.command == "gamelog-import":
+        print("Games:", sum(writeArchive(args.archive, pgnGames(path)) for path in args.pgn))
+    elif args.command == "gamelog-show":
+        return runGameLogShow(args)
+    elif args.command == "index-build":
+        print("Entries:", buildPositionIndex(args.archive, args.out, args.max_ply))
+    elif args.command == "index-query":
+        return runIndexQuery(args)
+    elif args.command == "footprint":
+        runFootprint(args)
+    elif args.command == "tablebase-build":
+        try:
+            for signature in args.signatures:
+                print(generateTable(signature, args.directory, print))
+        except InvalidSignature as error:
+            print("invalid material signature:", error)
+            return 1
+    elif args.command == "tablebase-probe":
+        return runTablebaseProbe(args)
+    elif args.command == "pgn":
+        return 0 if runValidation(args.path, args.quiet, args.workers) == 0 else 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+import numpy as np
+from chess.constants import WHITE, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING
+from chess.evaluate import MIDDLEGAME, ENDGAME, PIECE_PHASE, MAX_PHASE
+from chess.tables import DIRECTION_DELTAS, KNIGHT_DELTAS, ROOK_DIRECTIONS, BISHOP_DIRECTIONS
+from chess.bitboard import FULL, NOT_A, NOT_H, NOT_AB, NOT_GH
+
+# plane p holds White's piece type p + 1 for p < 6 and Black's piece type p - 5 after that
+PLANE_PIECES = (PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, PAWN | 8, KNIGHT | 8, BISHOP | 8, ROOK | 8, QUEEN | 8, KING | 8)
+
+# centipawns per square a piece can move to, not counting squares held by its own side
+MOBILITY_WEIGHTS = (0, 0, 4, 5, 2, 1, 0)
+
+# one (plane, square) row per input with middlegame, endgame and phase columns, so a single matrix product
+# scores a whole batch; float32 keeps these integer sums exact and lets BLAS do the work
+SCORE_WEIGHTS = np.array([[MIDDLEGAME[piece][square], ENDGAME[piece][square], PIECE_PHASE[piece]]
+    for piece in PLANE_PIECES for square in range(64)], dtype=np.float32)
+
+CHUNK_POSITIONS = 4096
+
+BYTE_POP_COUNTS = np.array([bin(byte).count("1") for byte in range(256)], dtype=np.uint8)
+
+def _step(fileStep: int, rankStep: int) -> tuple:
+    # (bit shift, mask clearing the squares that wrapped around a board edge) for one step on a bitboard
+    wrapMask = FULL
+    if fileStep > 0: wrapMask = NOT_A if fileStep == 1 else NOT_AB
+    if fileStep < 0: wrapMask = NOT_H if fileStep == -1 else NOT_GH
+    return rankStep * 8 + fileStep, np.uint64(wrapMask)
+
+DIRECTION_STEPS = [_step(fileStep, rankStep) for fileStep, rankStep in DIRECTION_DELTAS]
+KNIGHT_STEPS = [_step(fileStep, rankStep) for fileStep, rankStep in KNIGHT_DELTAS]
+
+# mobility planes are White's then Black's sliders; each column's moves are weighted by its piece and side
+DIAGONAL_PLANES = [BISHOP - 1, QUEEN - 1, BISHOP + 5, QUEEN + 5]
+ORTHOGONAL_PLANES = [ROOK - 1, QUEEN - 1, ROOK + 5, QUEEN + 5]
+DIAGONAL_WEIGHTS = np.array([MOBILITY_WEIGHTS[BISHOP], MOBILITY_WEIGHTS[QUEEN], -MOBILITY_WEIGHTS[BISHOP], -MOBILITY_WEIGHTS[QUEEN]], dtype=np.int32)
+ORTHOGONAL_WEIGHTS = np.array([MOBILITY_WEIGHTS[ROOK], MOBILITY_WEIGHTS[QUEEN], -MOBILITY_WEIGHTS[ROOK], -MOBILITY_WEIGHTS[QUEEN]], dtype=np.int32)
+KNIGHT_WEIGHTS = np.array([MOBILITY_WEIGHTS[KNIGHT], -MOBILITY_WEIGHTS[KNIGHT]], dtype=np.int32)
+
+def packPositions(positions: list) -> tuple:
+    # returns (planes, sideToMove): an (N, 12, 64) uint8 occupancy array and an (N,) array of colors.
+    # Works for Position and CompactPosition alike, as both keep the mailbox as 64 bytes
+    boards = np.frombuffer(b"".join(position.board for position in positions), dtype=np.int8).reshape(len(positions), 64)
+    planes = (boards[:, None, :] == np.array(PLANE_PIECES, dtype=np.int8)[None, :, None]).astype(np.uint8)
+    sideToMove = np.array([position.sideToMove for position in positions], dtype=np.int8)
+    return planes, sideToMove
+
+def toBitboards(planes: np.ndarray) -> np.ndarray:
+    # (N, 12, 64) planes to an (N, 12) array of 64-bit boards with square s at bit s
+    return np.packbits(planes, axis=2, bitorder="little").view("<u8")[..., 0]
+
+def _popCount(boards: np.ndarray) -> np.ndarray:
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(boards).astype(np.int32)
+    # NumPy before 2.0 has no popcount ufunc
+    return BYTE_POP_COUNTS[boards.view(np.uint8)].reshape(boards.shape + (8,)).sum(axis=-1, dtype=np.int32)
+
+def _shift(boards: np.ndarray, step: tuple) -> np.ndarray:
+    shift, wrapMask = step
+    return (boards << np.uint64(shift) if shift > 0 else boards >> np.uint64(-shift)) & wrapMask
+
+def _sliderMoves(sliders: np.ndarray, empty: np.ndarray, notOwn: np.ndarray, directions: tuple) -> np.ndarray:
+    # the nearest slider behind a square is the only one that reaches it along a given direction, so
+    # summing each direction's fill counts every slider's moves without any per-piece loop
+    total = np.zeros(sliders.shape, dtype=np.int32)
+    for direction in directions:
+        step = DIRECTION_STEPS[direction]
+        front = sliders
+        reached = np.zeros_like(sliders)
+        for _ in range(7):
+            front = _shift(front, step)
+            reached |= front
+            front &= empty
+            if not front.any(): break
+        total += _popCount(reached & notOwn)
+    return total
+
+def mobility(planes: np.ndarray) -> np.ndarray:
+    # White-relative weighted count of pseudo-legal knight, bishop, rook and queen moves, shape (N,)
+    boards = toBitboards(planes)
+    white = np.bitwise_or.reduce(boards[:, :6], axis=1)
+    black = np.bitwise_or.reduce(boards[:, 6:], axis=1)
+    empty = ~(white | black)[:, None]
+    notOwn = np.stack([~white, ~white, ~black, ~black], axis=1)
+
+    # likewise no two knights land on the same square by the same jump
+    knights = boards[:, [KNIGHT - 1, KNIGHT + 5]]
+    knightMoves = np.zeros(knights.shape, dtype=np.int32)
+    for step in KNIGHT_STEPS:
+        knightMoves += _popCount(_shift(knights, step) & notOwn[:, 1:3])
+    diagonalMoves = _sliderMoves(boards[:, DIAGONAL_PLANES], empty, notOwn, BISHOP_DIRECTIONS)
+    orthogonalMoves = _sliderMoves(boards[:, ORTHOGONAL_PLANES], empty, notOwn, ROOK_DIRECTIONS)
+    return knightMoves @ KNIGHT_WEIGHTS + diagonalMoves @ DIAGONAL_WEIGHTS + orthogonalMoves @ ORTHOGONAL_WEIGHTS
+
+def evaluateBatch(planes: np.ndarray, sideToMove: np.ndarray, includeMobility: bool = True) -> np.ndarray:
+    # tapered material and piece-square score, plus mobility, for every position at once; shape (N,) and,
+    # like evaluate(), from the side to move's point of view. Without mobility it matches evaluate() exactly
+    if len(planes) > CHUNK_POSITIONS:
+        # bounds the float copy of the planes, and keeps each chunk's temporaries in cache
+        return np.concatenate([evaluateBatch(planes[start:start + CHUNK_POSITIONS], sideToMove[start:start + CHUNK_POSITIONS], includeMobility)
+            for start in range(0, len(planes), CHUNK_POSITIONS)])
+    sums = (planes.reshape(len(planes), 12 * 64).astype(np.float32) @ SCORE_WEIGHTS).astype(np.int32)
+    middlegame, endgame = sums[:, 0], sums[:, 1]
+    phase = np.minimum(sums[:, 2], MAX_PHASE)
+    score = (middlegame * phase + endgame * (MAX_PHASE - phase)) // MAX_PHASE
+    if includeMobility:
+        score += mobility(planes)
+    return np.where(sideToMove == WHITE, score, -score)
+
+def evaluatePositions(positions: list, includeMobility: bool = True) -> np.ndarray:
+    planes, sideToMove = packPositions(positions)
+    return evaluateBatch(planes, sideToMove, includeMobility)
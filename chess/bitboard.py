@@ -0,0 +1,35 @@
+FULL = 0xFFFFFFFFFFFFFFFF
+FILE_A = 0x0101010101010101
+FILE_B = FILE_A << 1
+FILE_G = FILE_A << 6
+FILE_H = FILE_A << 7
+RANK_1 = 0xFF
+RANK_2 = RANK_1 << 8
+RANK_3 = RANK_1 << 16
+RANK_4 = RANK_1 << 24
+RANK_5 = RANK_1 << 32
+RANK_6 = RANK_1 << 40
+RANK_7 = RANK_1 << 48
+RANK_8 = RANK_1 << 56
+
+NOT_A = FULL ^ FILE_A
+NOT_H = FULL ^ FILE_H
+NOT_AB = FULL ^ (FILE_A | FILE_B)
+NOT_GH = FULL ^ (FILE_G | FILE_H)
+
+def squares(bb: int) -> list:
+    result = []
+    while bb:
+        low = bb & -bb
+        result.append(low.bit_length() - 1)
+        bb ^= low
+    return result
+
+def north(bb: int) -> int: return (bb << 8) & FULL
+def south(bb: int) -> int: return bb >> 8
+def east(bb: int) -> int: return (bb << 1) & NOT_A & FULL
+def west(bb: int) -> int: return (bb >> 1) & NOT_H
+def northEast(bb: int) -> int: return (bb << 9) & NOT_A & FULL
+def northWest(bb: int) -> int: return (bb << 7) & NOT_H & FULL
+def southEast(bb: int) -> int: return (bb >> 7) & NOT_A
+def southWest(bb: int) -> int: return (bb >> 9) & NOT_H
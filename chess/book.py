@@ -0,0 +1,109 @@
+import mmap
+import os
+import random
+from struct import Struct
+from chess.constants import WHITE
+from chess.position import Position
+from chess.pgn import readPgn
+
+# Polyglot's record layout, big-endian key:64 | move:16 | weight:16 | learn:32, sorted by key. Keys are this
+# package's Zobrist keys and moves its own from | to << 6 | promotion << 12 encoding, so the files are not
+# interchangeable with Polyglot books
+ENTRY = Struct(">QHHI")
+ENTRY_BYTES = ENTRY.size
+KEY = Struct(">Q")
+MAX_WEIGHT = 0xFFFF
+
+# book weight a move earns from one game, by result from the mover's side
+WIN_WEIGHT = 2
+DRAW_WEIGHT = 1
+RESULT_SCORES = {"1-0": (WIN_WEIGHT, 0), "0-1": (0, WIN_WEIGHT), "1/2-1/2": (DRAW_WEIGHT, DRAW_WEIGHT)}
+UNKNOWN_RESULT = (DRAW_WEIGHT, DRAW_WEIGHT)
+
+class OpeningBook:
+    # lookups read straight from the mapped file, so opening a book costs nothing up front and
+    # every process using the same file shares its pages
+    def __init__(self, path: str):
+        self.file = open(path, "rb")
+        size = os.fstat(self.file.fileno()).st_size
+        self.count = size // ENTRY_BYTES
+        self.memory = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if self.count else None
+
+    def close(self) -> None:
+        if self.memory is not None:
+            self.memory.close()
+        self.file.close()
+
+    def _firstIndex(self, key: int) -> int:
+        # index of the first entry whose key is not below key
+        low, high = 0, self.count
+        unpackKey = KEY.unpack_from
+        memory = self.memory
+        while low < high:
+            middle = (low + high) >> 1
+            if unpackKey(memory, middle * ENTRY_BYTES)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def entries(self, key: int) -> list:
+        # (move, weight, learn) for every book move from the position with this key, heaviest first
+        found = []
+        index = self._firstIndex(key)
+        while index < self.count:
+            entryKey, move, weight, learn = ENTRY.unpack_from(self.memory, index * ENTRY_BYTES)
+            if entryKey != key: break
+            found.append((move, weight, learn))
+            index += 1
+        return found
+
+    def probe(self, position: Position, generator: random.Random = random) -> int:
+        # a legal book move picked with probability proportional to its weight, or None when out of book
+        legal = position.legalMoves()
+        candidates = [(move, weight) for move, weight, _ in self.entries(position.key) if move in legal and weight]
+        if not candidates:
+            return None
+        pick = generator.randrange(sum(weight for _, weight in candidates))
+        for move, weight in candidates:
+            pick -= weight
+            if pick < 0:
+                return move
+
+def buildBook(pgnPaths: list, outPath: str, maxPly: int = 20, minGames: int = 1) -> int:
+    # counts the moves played in the first maxPly plies of every valid game, weights them by result and
+    # writes the sorted book; moves seen in fewer than minGames games are left out. Returns the entry count
+    weights = {}
+    games = {}
+    for path in pgnPaths:
+        played = []
+        def visit(position, move):
+            if len(played) < maxPly:
+                played.append((position.key, move, position.sideToMove))
+        for game in readPgn(path, visit=visit):
+            if game.valid:
+                scores = RESULT_SCORES.get(game.result, UNKNOWN_RESULT)
+                for key, move, color in played:
+                    weights[key, move] = weights.get((key, move), 0) + scores[color != WHITE]
+                    games[key, move] = games.get((key, move), 0) + 1
+            played.clear()
+
+    # scale each position's weights down together so the heaviest still fits in 16 bits
+    heaviest = {}
+    for (key, move), weight in weights.items():
+        heaviest[key] = max(heaviest.get(key, 0), weight)
+    entries = []
+    for (key, move), weight in weights.items():
+        if games[key, move] < minGames: continue
+        if heaviest[key] > MAX_WEIGHT:
+            weight = weight * MAX_WEIGHT // heaviest[key]
+        if weight:
+            entries.append((key, -weight, move))
+    entries.sort()
+
+    buffer = bytearray(len(entries) * ENTRY_BYTES)
+    for index, (key, weight, move) in enumerate(entries):
+        ENTRY.pack_into(buffer, index * ENTRY_BYTES, key, move, -weight, 0)
+    with open(outPath, "wb") as out:
+        out.write(buffer)
+    return len(entries)
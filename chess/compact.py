@@ -0,0 +1,116 @@
+import random
+import sys
+from array import array
+from struct import Struct
+from chess.position import Position
+
+# fixed-width snapshot, little-endian with no padding: mailbox:64s | sideToMove:B | castling:B | epSquare:b |
+# halfmoveClock:H | fullmoveNumber:H | key:Q, 79 bytes. Positions pack and unpack with a single struct call
+SNAPSHOT = Struct("<64sBBbHHQ")
+SNAPSHOT_BYTES = SNAPSHOT.size
+
+class CompactPosition:
+    # just the game state: the mailbox as 64 bytes plus a few integers. It has no attack map, bitboards or
+    # undo stacks, so trees, caches and replay buffers can hold many of them; toPosition() rebuilds the rest
+    __slots__ = ("board", "sideToMove", "castling", "epSquare", "halfmoveClock", "fullmoveNumber", "key")
+
+    def __init__(self, board: bytes, sideToMove: int, castling: int, epSquare: int, halfmoveClock: int, fullmoveNumber: int, key: int):
+        self.board = board
+        self.sideToMove = sideToMove
+        self.castling = castling
+        self.epSquare = epSquare
+        self.halfmoveClock = halfmoveClock
+        self.fullmoveNumber = fullmoveNumber
+        self.key = key
+
+    @classmethod
+    def fromPosition(cls, position: Position) -> "CompactPosition":
+        return cls(bytes(position.board), position.sideToMove, position.castling, position.epSquare,
+            position.halfmoveClock, position.fullmoveNumber, position.key)
+
+    def toPosition(self) -> Position:
+        position = Position()
+        position.setBoard(self.board)
+        position.sideToMove = self.sideToMove
+        position.castling = self.castling
+        position.epSquare = self.epSquare
+        position.halfmoveClock = self.halfmoveClock
+        position.fullmoveNumber = self.fullmoveNumber
+        position.key = self.key
+        return position
+
+    def toBytes(self) -> bytes:
+        return SNAPSHOT.pack(self.board, self.sideToMove, self.castling, self.epSquare, self.halfmoveClock, self.fullmoveNumber, self.key)
+
+    @classmethod
+    def fromBytes(cls, data: bytes, offset: int = 0) -> "CompactPosition":
+        return cls(*SNAPSHOT.unpack_from(data, offset))
+
+    def __eq__(self, other) -> bool:
+        return (isinstance(other, CompactPosition) and self.key == other.key and self.board == other.board
+            and self.sideToMove == other.sideToMove and self.castling == other.castling and self.epSquare == other.epSquare
+            and self.halfmoveClock == other.halfmoveClock and self.fullmoveNumber == other.fullmoveNumber)
+
+    def __hash__(self) -> int:
+        return hash(self.key)
+
+def snapshot(position: Position) -> bytes:
+    return CompactPosition.fromPosition(position).toBytes()
+
+def restore(data: bytes, offset: int = 0) -> Position:
+    # a fresh Position with no move history; the snapshot's key is trusted rather than recomputed
+    return CompactPosition.fromBytes(data, offset).toPosition()
+
+def snapshotWithHistory(position: Position) -> bytes:
+    # the snapshot from the last irreversible move followed by the moves since, 2 bytes each, so the
+    # position rebuilt on the other side still sees every repetition a search could run into
+    moves = array("H", [position.unmakeMove() for _ in range(min(position.ply, position.halfmoveClock))])
+    data = snapshot(position)
+    moves.reverse()
+    for move in moves:
+        position.makeMove(move)
+    if sys.byteorder == "big": moves.byteswap()
+    return data + moves.tobytes()
+
+def restoreWithHistory(data: bytes) -> Position:
+    position = restore(data)
+    moves = array("H")
+    moves.frombytes(data[SNAPSHOT_BYTES:])
+    if sys.byteorder == "big": moves.byteswap()
+    for move in moves:
+        position.makeMove(move)
+    return position
+
+def _deepSize(obj, seen: set) -> int:
+    if id(obj) in seen: return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (list, tuple)):
+        size += sum(_deepSize(item, seen) for item in obj)
+    elif isinstance(obj, dict):
+        size += sum(_deepSize(key, seen) + _deepSize(value, seen) for key, value in obj.items())
+    for name in getattr(type(obj), "__slots__", ()):
+        size += _deepSize(getattr(obj, name), seen)
+    if hasattr(obj, "__dict__"):
+        size += _deepSize(obj.__dict__, seen)
+    return size
+
+def bytesPerPosition(positions: list) -> float:
+    # average memory held by each object, following lists, dicts and slots; objects shared between them,
+    # like the interpreter's cached small ints, are counted once or not at all
+    seen = {id(number) for number in range(-5, 257)}
+    return sum(_deepSize(position, seen) for position in positions) / len(positions)
+
+def samplePositions(count: int, seed: int = 0) -> list:
+    # positions along random games from the start, a stand-in for what a tree or replay cache holds
+    generator = random.Random(seed)
+    positions = []
+    position = Position.startingPosition()
+    while len(positions) < count:
+        moves = position.legalMoves()
+        if not moves or position.halfmoveClock >= 100:
+            position = Position.startingPosition()
+            continue
+        position.makeMove(generator.choice(moves))
+        positions.append(position.copy())
+    return positions
@@ -0,0 +1,42 @@
+from enum import Enum
+
+class Color(Enum):
+    White = 0
+    Black = 1
+class ChessPiece(Enum):
+    Pawn = 1
+    Knight = 2
+    Bishop = 3
+    Rook = 4
+    Queen = 5
+    King = 6
+
+WHITE = 0
+BLACK = 1
+
+EMPTY = 0
+PAWN = 1
+KNIGHT = 2
+BISHOP = 3
+ROOK = 4
+QUEEN = 5
+KING = 6
+
+WHITE_KINGSIDE = 1
+WHITE_QUEENSIDE = 2
+BLACK_KINGSIDE = 4
+BLACK_QUEENSIDE = 8
+ALL_CASTLING = 15
+
+NO_SQUARE = -1
+FILES = "abcdefgh"
+PIECE_LETTERS = ".pnbrqk"
+
+# castling rights that survive a move touching each square
+CASTLING_MASK = [ALL_CASTLING] * 64
+CASTLING_MASK[0] &= ~WHITE_QUEENSIDE
+CASTLING_MASK[7] &= ~WHITE_KINGSIDE
+CASTLING_MASK[4] &= ~(WHITE_KINGSIDE | WHITE_QUEENSIDE)
+CASTLING_MASK[56] &= ~BLACK_QUEENSIDE
+CASTLING_MASK[63] &= ~BLACK_KINGSIDE
+CASTLING_MASK[60] &= ~(BLACK_KINGSIDE | BLACK_QUEENSIDE)
@@ -0,0 +1,117 @@
+from chess.constants import WHITE, PAWN, KING
+
+# centipawn values indexed by piece type; ChessPiece enum values are identifiers, not material
+PIECE_VALUES = [0, 100, 320, 330, 500, 900, 0]
+ENDGAME_VALUES = [0, 120, 300, 320, 520, 950, 0]
+
+# game phase drops from 24 with all minor and major pieces on the board to 0 with none
+PHASE_WEIGHTS = [0, 0, 1, 1, 2, 4, 0]
+MAX_PHASE = 24
+
+# piece-square tables from White's side, rank 8 first, so White's square s reads entry s ^ 56
+PAWN_TABLE = (
+      0,   0,   0,   0,   0,   0,   0,   0,
+     50,  50,  50,  50,  50,  50,  50,  50,
+     10,  10,  20,  30,  30,  20,  10,  10,
+      5,   5,  10,  25,  25,  10,   5,   5,
+      0,   0,   0,  20,  20,   0,   0,   0,
+      5,  -5, -10,   0,   0, -10,  -5,   5,
+      5,  10,  10, -20, -20,  10,  10,   5,
+      0,   0,   0,   0,   0,   0,   0,   0)
+PAWN_ENDGAME_TABLE = (
+      0,   0,   0,   0,   0,   0,   0,   0,
+    100, 100, 100, 100, 100, 100, 100, 100,
+     60,  60,  60,  60,  60,  60,  60,  60,
+     35,  35,  35,  35,  35,  35,  35,  35,
+     20,  20,  20,  20,  20,  20,  20,  20,
+     10,  10,  10,  10,  10,  10,  10,  10,
+      0,   0,   0,   0,   0,   0,   0,   0,
+      0,   0,   0,   0,   0,   0,   0,   0)
+KNIGHT_TABLE = (
+    -50, -40, -30, -30, -30, -30, -40, -50,
+    -40, -20,   0,   0,   0,   0, -20, -40,
+    -30,   0,  10,  15,  15,  10,   0, -30,
+    -30,   5,  15,  20,  20,  15,   5, -30,
+    -30,   0,  15,  20,  20,  15,   0, -30,
+    -30,   5,  10,  15,  15,  10,   5, -30,
+    -40, -20,   0,   5,   5,   0, -20, -40,
+    -50, -40, -30, -30, -30, -30, -40, -50)
+BISHOP_TABLE = (
+    -20, -10, -10, -10, -10, -10, -10, -20,
+    -10,   0,   0,   0,   0,   0,   0, -10,
+    -10,   0,   5,  10,  10,   5,   0, -10,
+    -10,   5,   5,  10,  10,   5,   5, -10,
+    -10,   0,  10,  10,  10,  10,   0, -10,
+    -10,  10,  10,  10,  10,  10,  10, -10,
+    -10,   5,   0,   0,   0,   0,   5, -10,
+    -20, -10, -10, -10, -10, -10, -10, -20)
+ROOK_TABLE = (
+      0,   0,   0,   0,   0,   0,   0,   0,
+      5,  10,  10,  10,  10,  10,  10,   5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+      0,   0,   0,   5,   5,   0,   0,   0)
+QUEEN_TABLE = (
+    -20, -10, -10,  -5,  -5, -10, -10, -20,
+    -10,   0,   0,   0,   0,   0,   0, -10,
+    -10,   0,   5,   5,   5,   5,   0, -10,
+     -5,   0,   5,   5,   5,   5,   0,  -5,
+      0,   0,   5,   5,   5,   5,   0,  -5,
+    -10,   5,   5,   5,   5,   5,   0, -10,
+    -10,   0,   5,   0,   0,   0,   0, -10,
+    -20, -10, -10,  -5,  -5, -10, -10, -20)
+KING_TABLE = (
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -20, -30, -30, -40, -40, -30, -30, -20,
+    -10, -20, -20, -20, -20, -20, -20, -10,
+     20,  20,   0,   0,   0,   0,  20,  20,
+     20,  30,  10,   0,   0,  10,  30,  20)
+KING_ENDGAME_TABLE = (
+    -50, -40, -30, -20, -20, -30, -40, -50,
+    -30, -20, -10,   0,   0, -10, -20, -30,
+    -30, -10,  20,  30,  30,  20, -10, -30,
+    -30, -10,  30,  40,  40,  30, -10, -30,
+    -30, -10,  30,  40,  40,  30, -10, -30,
+    -30, -10,  20,  30,  30,  20, -10, -30,
+    -30, -30,   0,   0,   0,   0, -30, -30,
+    -50, -30, -30, -30, -30, -30, -30, -50)
+
+MIDDLEGAME_TABLES = [None, PAWN_TABLE, KNIGHT_TABLE, BISHOP_TABLE, ROOK_TABLE, QUEEN_TABLE, KING_TABLE]
+ENDGAME_TABLES = [None, PAWN_ENDGAME_TABLE, KNIGHT_TABLE, BISHOP_TABLE, ROOK_TABLE, QUEEN_TABLE, KING_ENDGAME_TABLE]
+
+# MIDDLEGAME[piece][square] and ENDGAME[piece][square] are White-relative material plus placement,
+# indexed by piece code so Position can add or subtract them as pieces appear and disappear
+MIDDLEGAME = [[0] * 64 for _ in range(15)]
+ENDGAME = [[0] * 64 for _ in range(15)]
+PIECE_PHASE = [0] * 15
+for _kind in range(PAWN, KING + 1):
+    for _square in range(64):
+        MIDDLEGAME[_kind][_square] = PIECE_VALUES[_kind] + MIDDLEGAME_TABLES[_kind][_square ^ 56]
+        ENDGAME[_kind][_square] = ENDGAME_VALUES[_kind] + ENDGAME_TABLES[_kind][_square ^ 56]
+        MIDDLEGAME[_kind | 8][_square] = -(PIECE_VALUES[_kind] + MIDDLEGAME_TABLES[_kind][_square])
+        ENDGAME[_kind | 8][_square] = -(ENDGAME_VALUES[_kind] + ENDGAME_TABLES[_kind][_square])
+    PIECE_PHASE[_kind] = PIECE_PHASE[_kind | 8] = PHASE_WEIGHTS[_kind]
+
+def taper(middlegame: int, endgame: int, phase: int) -> int:
+    phase = min(phase, MAX_PHASE)
+    return (middlegame * phase + endgame * (MAX_PHASE - phase)) // MAX_PHASE
+
+def computeScores(position) -> tuple:
+    middlegame = endgame = phase = 0
+    for square in range(64):
+        piece = position.board[square]
+        middlegame += MIDDLEGAME[piece][square]
+        endgame += ENDGAME[piece][square]
+        phase += PIECE_PHASE[piece]
+    return middlegame, endgame, phase
+
+def evaluate(position) -> int:
+    # Position keeps the middlegame/endgame sums and phase up to date on every make and unmake
+    score = taper(position.middlegameScore, position.endgameScore, position.phase)
+    return score if position.sideToMove == WHITE else -score
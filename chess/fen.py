@@ -0,0 +1,111 @@
+from chess.constants import *
+from chess.position import Position, makePiece, parseSquare, squareName, InvalidSquareName
+from chess.bitboard import RANK_1, RANK_8
+
+STARTING_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+PIECE_CODES = {}
+PIECE_SYMBOLS = [""] * 15
+for _kind in range(PAWN, KING + 1):
+    PIECE_CODES[PIECE_LETTERS[_kind].upper()] = makePiece(WHITE, _kind)
+    PIECE_CODES[PIECE_LETTERS[_kind]] = makePiece(BLACK, _kind)
+for _symbol, _piece in PIECE_CODES.items():
+    PIECE_SYMBOLS[_piece] = _symbol
+EMPTY_RUNS = {str(run): run for run in range(1, 9)}
+CASTLING_LETTERS = "KQkq"
+# (right, king home, rook home, color) for each castling right
+CASTLING_HOMES = ((WHITE_KINGSIDE, 4, 7, WHITE), (WHITE_QUEENSIDE, 4, 0, WHITE),
+    (BLACK_KINGSIDE, 60, 63, BLACK), (BLACK_QUEENSIDE, 60, 56, BLACK))
+
+class InvalidFen(Exception): pass
+
+def parseFen(fen: str) -> Position:
+    fields = fen.split()
+    if len(fields) < 4:
+        raise InvalidFen(fen)
+    position = Position()
+
+    rows = fields[0].split("/")
+    if len(rows) != 8:
+        raise InvalidFen(fen)
+    board = [EMPTY] * 64
+    for rowIndex, row in enumerate(rows):
+        square = (7 - rowIndex) * 8
+        end = square + 8
+        for char in row:
+            run = EMPTY_RUNS.get(char)
+            if run is not None:
+                square += run
+                continue
+            piece = PIECE_CODES.get(char)
+            if piece is None or square >= end:
+                raise InvalidFen(fen)
+            board[square] = piece
+            square += 1
+        if square != end:
+            raise InvalidFen(fen)
+    position.setBoard(board)
+
+    if fields[1] not in ("w", "b"):
+        raise InvalidFen(fen)
+    position.sideToMove = WHITE if fields[1] == "w" else BLACK
+
+    castling = 0
+    if fields[2] != "-":
+        for char in fields[2]:
+            right = CASTLING_LETTERS.find(char)
+            if right < 0:
+                raise InvalidFen(fen)
+            castling |= 1 << right
+    position.castling = castling
+
+    try:
+        position.epSquare = NO_SQUARE if fields[3] == "-" else parseSquare(fields[3])
+        position.halfmoveClock = int(fields[4]) if len(fields) > 4 else 0
+        position.fullmoveNumber = int(fields[5]) if len(fields) > 5 else 1
+    except (InvalidSquareName, ValueError):
+        raise InvalidFen(fen)
+
+    for color in (WHITE, BLACK):
+        kings = position.pieces[color][KING]
+        if not kings or kings & (kings - 1):
+            raise InvalidFen(fen)
+    if (position.pieces[WHITE][PAWN] | position.pieces[BLACK][PAWN]) & (RANK_1 | RANK_8):
+        raise InvalidFen(fen)
+    if position.kingInCheck(position.sideToMove ^ 1):
+        raise InvalidFen(fen)
+
+    # rights and en-passant squares the board cannot back up are dropped rather than trusted by move generation
+    for right, kingHome, rookHome, color in CASTLING_HOMES:
+        if board[kingHome] != makePiece(color, KING) or board[rookHome] != makePiece(color, ROOK):
+            position.castling &= ~right
+    epSquare = position.epSquare
+    if epSquare != NO_SQUARE:
+        us = position.sideToMove
+        forward = 8 if us == WHITE else -8
+        if (epSquare >> 3 != (5 if us == WHITE else 2) or board[epSquare - forward] != makePiece(us ^ 1, PAWN)
+                or board[epSquare] != EMPTY or board[epSquare + forward] != EMPTY):
+            position.epSquare = NO_SQUARE
+    position.key = position.computeKey()
+    return position
+
+def toFen(position: Position) -> str:
+    board = position.board
+    rows = []
+    for rank in range(7, -1, -1):
+        row = ""
+        run = 0
+        for piece in board[rank * 8:rank * 8 + 8]:
+            if piece == EMPTY:
+                run += 1
+                continue
+            if run:
+                row += str(run)
+                run = 0
+            row += PIECE_SYMBOLS[piece]
+        rows.append(row + str(run) if run else row)
+
+    castling = "".join(letter for right, letter in enumerate(CASTLING_LETTERS) if position.castling >> right & 1)
+    epSquare = "-" if position.epSquare == NO_SQUARE else squareName(position.epSquare)
+    return "%s %s %s %s %d %d" % ("/".join(rows), "w" if position.sideToMove == WHITE else "b", castling or "-",
+        epSquare, position.halfmoveClock, position.fullmoveNumber)
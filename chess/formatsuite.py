@@ -0,0 +1,166 @@
+import os
+import random
+import shutil
+import tempfile
+from time import perf_counter
+from chess.compact import snapshot, restore
+from chess.gamelog import GameLog, GameLogWriter, PlyOutOfRange, RESULT_NAMES, writeArchive, readArchive
+from chess.position import Position
+from chess.positionindex import PositionIndex, buildPositionIndex
+from chess.tablebase import Tablebase, TableLayout, generateTable, tablePath, DRAW, WIN, LOSS, UNUSED
+
+# the on-disk formats checked against a straightforward recomputation, on random games in a scratch directory
+INTERVAL = 8
+# the longest forced mate, in moves, in tables quick enough to generate on every run
+LONGEST_MATES = (("KQvK", 10), ("KRvK", 16))
+# ply counts around the snapshot interval, where the block arithmetic has its edge cases
+EDGE_PLIES = (0, 1, INTERVAL - 1, INTERVAL, INTERVAL + 1, 2 * INTERVAL, 2 * INTERVAL + 1)
+
+def randomGames(count: int, seed: int = 0, maxPlies: int = 120) -> list:
+    # (start snapshot, moves, result) for random playouts from the starting position; the first games
+    # have the EDGE_PLIES lengths, unless the playout runs out of moves before that
+    generator = random.Random(seed)
+    games = []
+    for number in range(count):
+        plies = EDGE_PLIES[number] if number < len(EDGE_PLIES) else generator.randrange(maxPlies + 1)
+        position = Position.startingPosition()
+        start = snapshot(position)
+        moves = []
+        while len(moves) < plies:
+            legal = position.legalMoves()
+            if not legal: break
+            moves.append(generator.choice(legal))
+            position.makeMove(moves[-1])
+        games.append((start, moves, generator.choice(list(RESULT_NAMES))))
+    return games
+
+def _report(name: str, passed: bool, start: float) -> bool:
+    print("%-28s %-4s %8.3fs" % (name, "ok" if passed else "FAIL", perf_counter() - start))
+    return passed
+
+def checkGameLog(directory: str, games: list) -> bool:
+    path = os.path.join(directory, "games.cgl")
+    half = len(games) // 2
+
+    # written by two writers, the second appending to what the first closed
+    start = perf_counter()
+    writeArchive(path, games[:half], INTERVAL)
+    writeArchive(path, games[half:], INTERVAL)
+    passed = [(bytes(first), moves, result) for first, moves, result in readArchive(path)] == games
+    allPassed = _report("gamelog round trip", passed, start)
+
+    # every ply against replaying the game from its start
+    start = perf_counter()
+    passed = True
+    log = GameLog(path)
+    try:
+        for gameId, (first, moves, _) in enumerate(games):
+            position = restore(first)
+            for ply in range(len(moves) + 1):
+                if ply: position.makeMove(moves[ply - 1])
+                passed = passed and snapshot(log.positionAt(gameId, ply)) == snapshot(position)
+            try:
+                log.positionAt(gameId, len(moves) + 1)
+                passed = False
+            except PlyOutOfRange:
+                pass
+    finally:
+        log.close()
+    allPassed = _report("gamelog positionAt", passed, start) and allPassed
+
+    # a writer that never reaches close() leaves no footer; every game it finished must still be found
+    start = perf_counter()
+    writer = GameLogWriter(path, INTERVAL)
+    writer.addGame(*games[0])
+    writer.file.close()
+    passed = [(bytes(first), moves, result) for first, moves, result in readArchive(path)] == games + games[:1]
+    writeArchive(path, games[1:2], INTERVAL)
+    passed = passed and [moves for _, moves, _ in readArchive(path)] == [moves for _, moves, _ in games + games[:2]]
+    return _report("gamelog interrupted writer", passed, start) and allPassed
+
+def _gamePositions(games: list, maxPly: int) -> dict:
+    # every key reached, with the (gameId, ply) pairs reaching it in order
+    found = {}
+    for gameId, (first, moves, _) in enumerate(games):
+        position = restore(first)
+        found.setdefault(position.key, []).append((gameId, 0))
+        for ply, move in enumerate(moves[:maxPly], 1):
+            position.makeMove(move)
+            found.setdefault(position.key, []).append((gameId, ply))
+    return found
+
+def checkPositionIndex(directory: str, games: list) -> bool:
+    archivePath = os.path.join(directory, "index.cgl")
+    indexPath = os.path.join(directory, "games.cpi")
+    writeArchive(archivePath, games, INTERVAL)
+    allPassed = True
+    # small runs and blocks so the merge and the block search both cross many boundaries
+    for name, maxPly, runEntries, blockEntries in (("index all plies", None, 500, 16), ("index maxPly 10", 10, 97, 1)):
+        start = perf_counter()
+        expected = _gamePositions(games, maxPly)
+        count = buildPositionIndex(archivePath, indexPath, maxPly, runEntries, blockEntries)
+        index = PositionIndex(indexPath)
+        try:
+            passed = count == sum(len(found) for found in expected.values())
+            for key, found in expected.items():
+                passed = passed and index.lookup(key) == found and index.lookup(key, 2) == found[:2]
+            # keys below, between and above the indexed ones
+            keys = sorted(expected)
+            for key in (0, keys[0] - 1, keys[-1] + 1, (1 << 64) - 1) + tuple(key + 1 for key in keys[:50]):
+                passed = passed and index.lookup(key) == expected.get(key, [])
+        finally:
+            index.close()
+        allPassed = _report(name, passed, start) and allPassed
+    return allPassed
+
+def _consistent(tablebase: Tablebase, position: Position) -> bool:
+    # the stored result must follow from the children's: mated or stalemated without moves, a win one ply
+    # longer than the quickest losing child, a loss one ply longer than the slowest child, otherwise a draw
+    wdl, plies = tablebase.probe(position, inPlies=True)
+    children = []
+    for move in position.legalMoves():
+        position.makeMove(move)
+        children.append(tablebase.probe(position, inPlies=True))
+        position.unmakeMove()
+    if not children:
+        return (wdl, plies) == ((LOSS, 0) if position.inCheck() else (DRAW, 0))
+    losing = [childPlies for childWdl, childPlies in children if childWdl == LOSS]
+    if wdl == WIN:
+        return bool(losing) and plies == min(losing) + 1
+    if wdl == LOSS:
+        return all(childWdl == WIN for childWdl, _ in children) and plies == max(childPlies for _, childPlies in children) + 1
+    return not losing and not all(childWdl == WIN for childWdl, _ in children)
+
+def checkTablebases(directory: str) -> bool:
+    allPassed = True
+    for signature, longest in LONGEST_MATES:
+        start = perf_counter()
+        generateTable(signature, directory)
+        layout = TableLayout(signature)
+        with open(tablePath(directory, layout.signature), "rb") as file:
+            values = file.read()
+        tablebase = Tablebase(directory)
+        position = Position()
+        try:
+            passed = max(value >> 2 for value in values if value & 3 != UNUSED) == longest
+            for index, value in enumerate(values):
+                if value & 3 == UNUSED: continue
+                squares, stm = layout.decode(index)
+                layout.place(position, squares, stm)
+                passed = passed and _consistent(tablebase, position)
+        finally:
+            tablebase.close()
+        allPassed = _report("tablebase " + layout.signature, passed, start) and allPassed
+    return allPassed
+
+def runFormatSuite(count: int = 200, seed: int = 0, tablebases: bool = True) -> bool:
+    games = randomGames(count, seed)
+    directory = tempfile.mkdtemp(prefix="format-suite-")
+    try:
+        passed = checkGameLog(directory, games)
+        passed = checkPositionIndex(directory, games) and passed
+        if tablebases:
+            passed = checkTablebases(os.path.join(directory, "tablebases")) and passed
+        return passed
+    finally:
+        shutil.rmtree(directory)
@@ -0,0 +1,188 @@
+import mmap
+import os
+import sys
+from array import array
+from struct import Struct
+from chess.compact import SNAPSHOT_BYTES, snapshot, restore
+from chess.fen import parseFen, STARTING_FEN
+from chess.pgn import readPgn
+from chess.position import Position
+
+class InvalidGameLog(Exception): pass
+class PlyOutOfRange(Exception): pass
+
+# archive layout: MAGIC, then the games back to back, then one 8-byte offset per game and the FOOTER.
+# A game is GAME_HEADER followed by blocks; block k is the snapshot after k * interval plies and then
+# the next interval moves, 2 bytes each. Blocks have a fixed size, so any ply is one read away
+MAGIC = b"CGL\x01"
+GAME_HEADER = Struct("<IHB")
+FOOTER = Struct("<QQ")
+SNAPSHOT_INTERVAL = 64
+
+UNKNOWN_RESULT = 0
+WHITE_WINS = 1
+BLACK_WINS = 2
+DRAWN = 3
+RESULT_CODES = {"*": UNKNOWN_RESULT, "1-0": WHITE_WINS, "0-1": BLACK_WINS, "1/2-1/2": DRAWN}
+RESULT_NAMES = {code: name for name, code in RESULT_CODES.items()}
+
+def _moveBytes(moves) -> bytes:
+    packed = array("H", moves)
+    if sys.byteorder == "big": packed.byteswap()
+    return packed.tobytes()
+
+def _movesFrom(data) -> list:
+    packed = array("H")
+    packed.frombytes(data)
+    if sys.byteorder == "big": packed.byteswap()
+    return packed.tolist()
+
+def _recordBytes(plies: int, interval: int) -> int:
+    return GAME_HEADER.size + (plies // interval + 1) * SNAPSHOT_BYTES + 2 * plies
+
+def _scanRecords(memory, size: int) -> tuple:
+    # the offsets of the complete game records that follow MAGIC, and where the last of them ends
+    offsets = array("Q")
+    offset = len(MAGIC)
+    while offset + GAME_HEADER.size <= size:
+        plies, interval, result = GAME_HEADER.unpack_from(memory, offset)
+        if not interval or result not in RESULT_NAMES or offset + _recordBytes(plies, interval) > size: break
+        offsets.append(offset)
+        offset += _recordBytes(plies, interval)
+    return offsets, offset
+
+class GameLogWriter:
+    # appends games to an archive, creating it if needed; the directory is rewritten by close(). Until then
+    # the archive has no footer and GameLog finds its games by walking the records, so an interrupted
+    # writer loses at most the game it was writing
+    def __init__(self, path: str, interval: int = SNAPSHOT_INTERVAL):
+        self.interval = interval
+        self.offsets = array("Q")
+        if os.path.exists(path) and os.path.getsize(path):
+            log = GameLog(path)
+            try:
+                self.offsets.extend(log.offsets)
+                directoryOffset = log.directoryOffset
+            finally:
+                log.close()
+            self.file = open(path, "r+b")
+            self.file.seek(directoryOffset)
+            self.file.truncate()
+        else:
+            self.file = open(path, "wb")
+            self.file.write(MAGIC)
+
+    def addGame(self, start: bytes, moves: list, result: int = UNKNOWN_RESULT) -> int:
+        # start is the snapshot the game begins from; the moves are replayed once to take the block snapshots.
+        # Returns the new game's id
+        self.offsets.append(self.file.tell())
+        parts = [GAME_HEADER.pack(len(moves), self.interval, result)]
+        position = restore(start)
+        for first in range(0, len(moves) + 1, self.interval):
+            block = moves[first:first + self.interval]
+            parts.append(start if first == 0 else snapshot(position))
+            parts.append(_moveBytes(block))
+            if len(block) == self.interval:
+                for move in block:
+                    position.makeMove(move)
+        self.file.write(b"".join(parts))
+        return len(self.offsets) - 1
+
+    def close(self) -> None:
+        directoryOffset = self.file.tell()
+        offsets = array("Q", self.offsets)
+        if sys.byteorder == "big": offsets.byteswap()
+        self.file.write(offsets.tobytes())
+        self.file.write(FOOTER.pack(directoryOffset, len(self.offsets)))
+        self.file.close()
+
+class GameLog:
+    # reads an archive through mmap; opening it reads only the footer and the directory. An archive left
+    # without a valid footer by an interrupted writer is recovered by walking its game records instead
+    def __init__(self, path: str):
+        self.file = open(path, "rb")
+        size = os.fstat(self.file.fileno()).st_size
+        if size < len(MAGIC):
+            self.file.close()
+            raise InvalidGameLog(path)
+        self.memory = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.memory[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise InvalidGameLog(path)
+        self.directoryOffset, self.count = 0, 0
+        if size >= len(MAGIC) + FOOTER.size:
+            self.directoryOffset, self.count = FOOTER.unpack_from(self.memory, size - FOOTER.size)
+        if len(MAGIC) <= self.directoryOffset and self.directoryOffset + 8 * self.count + FOOTER.size == size:
+            self.offsets = array("Q")
+            self.offsets.frombytes(self.memory[self.directoryOffset:self.directoryOffset + 8 * self.count])
+            if sys.byteorder == "big": self.offsets.byteswap()
+        else:
+            self.offsets, self.directoryOffset = _scanRecords(self.memory, size)
+            self.count = len(self.offsets)
+
+    def close(self) -> None:
+        self.memory.close()
+        self.file.close()
+
+    def header(self, gameId: int) -> tuple:
+        # (plies, interval, result)
+        return GAME_HEADER.unpack_from(self.memory, self.offsets[gameId])
+
+    def _block(self, gameId: int, index: int) -> int:
+        plies, interval, _ = self.header(gameId)
+        return self.offsets[gameId] + GAME_HEADER.size + index * (SNAPSHOT_BYTES + 2 * interval)
+
+    def game(self, gameId: int) -> tuple:
+        # (start snapshot, moves, result)
+        plies, interval, result = self.header(gameId)
+        moves = []
+        for index in range(plies // interval + 1):
+            offset = self._block(gameId, index) + SNAPSHOT_BYTES
+            moves.extend(_movesFrom(self.memory[offset:offset + 2 * min(interval, plies - index * interval)]))
+        start = self._block(gameId, 0)
+        return self.memory[start:start + SNAPSHOT_BYTES], moves, result
+
+    def positionAt(self, gameId: int, ply: int) -> Position:
+        # the position after ply moves: the nearest earlier snapshot plus fewer than interval replayed moves.
+        # Like any restored snapshot it carries no history from before that snapshot
+        plies, interval, _ = self.header(gameId)
+        if not 0 <= ply <= plies:
+            raise PlyOutOfRange(ply)
+        offset = self._block(gameId, ply // interval)
+        data = self.memory[offset:offset + SNAPSHOT_BYTES + 2 * (ply % interval)]
+        position = restore(data)
+        for move in _movesFrom(data[SNAPSHOT_BYTES:]):
+            position.makeMove(move)
+        return position
+
+    def games(self):
+        for gameId in range(self.count):
+            yield self.game(gameId)
+
+def writeArchive(path: str, games, interval: int = SNAPSHOT_INTERVAL) -> int:
+    # appends every (start snapshot, moves, result) to the archive; returns how many were written
+    writer = GameLogWriter(path, interval)
+    count = 0
+    try:
+        for start, moves, result in games:
+            writer.addGame(start, moves, result)
+            count += 1
+    finally:
+        writer.close()
+    return count
+
+def readArchive(path: str):
+    log = GameLog(path)
+    try:
+        yield from log.games()
+    finally:
+        log.close()
+
+def pgnGames(path: str):
+    # (start snapshot, moves, result) for every valid game of a PGN file
+    moves = []
+    for game in readPgn(path, visit=lambda position, move: moves.append(move)):
+        if game.valid:
+            start = snapshot(parseFen(game.headers.get("FEN", STARTING_FEN)))
+            yield start, moves[:], RESULT_CODES.get(game.result, UNKNOWN_RESULT)
+        moves.clear()
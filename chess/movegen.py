@@ -0,0 +1,140 @@
+from chess.bitboard import *
+from chess.tables import (KNIGHT_ATTACKS, KING_ATTACKS, BISHOP_MASKS, ROOK_MASKS, BETWEEN, LINE,
+    bishopAttacksFrom, rookAttacksFrom)
+from chess.constants import (WHITE, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, NO_SQUARE,
+    WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE)
+
+PROMOTIONS = (QUEEN << 12, ROOK << 12, BISHOP << 12, KNIGHT << 12)
+
+def _addPawnMoves(targets: int, delta: int, lastRank: int, pinned: int, pinLines: dict, moves: list) -> None:
+    append = moves.append
+    while targets:
+        low = targets & -targets
+        targets ^= low
+        to = low.bit_length() - 1
+        fromSquare = to - delta
+        if pinned >> fromSquare & 1 and not pinLines[fromSquare] & low: continue
+        if low & lastRank:
+            for promotion in PROMOTIONS:
+                append(fromSquare | to << 6 | promotion)
+        else:
+            append(fromSquare | to << 6)
+
+def _addPieceMoves(fromSquare: int, targets: int, append) -> None:
+    while targets:
+        low = targets & -targets
+        append(fromSquare | (low.bit_length() - 1) << 6)
+        targets ^= low
+
+def checkersAndPins(position) -> tuple:
+    us = position.sideToMove
+    them = us ^ 1
+    king = position.kingSquare[us]
+    enemy = position.pieces[them]
+    occupied = position.occupied
+    ours = position.pieces[us][0]
+    checkers = position.attackersOf(king, them, occupied)
+
+    pinned = 0
+    pinLines = {}
+    snipers = (BISHOP_MASKS[king] & (enemy[BISHOP] | enemy[QUEEN])) | (ROOK_MASKS[king] & (enemy[ROOK] | enemy[QUEEN]))
+    while snipers:
+        low = snipers & -snipers
+        snipers ^= low
+        sniper = low.bit_length() - 1
+        blockers = BETWEEN[king][sniper] & occupied
+        if blockers and blockers & (blockers - 1) == 0 and blockers & ours:
+            pinned |= blockers
+            pinLines[blockers.bit_length() - 1] = LINE[king][sniper]
+    return checkers, pinned, pinLines
+
+def generateLegalMoves(position, moves: list = None, capturesOnly: bool = False) -> list:
+    # capturesOnly keeps captures, en passant and promotions, the moves a quiescence search looks at
+    if moves is None: moves = []
+    append = moves.append
+    us = position.sideToMove
+    them = us ^ 1
+    own = position.pieces[us]
+    enemy = position.pieces[them]
+    occupied = position.occupied
+    notOurs = FULL ^ own[0]
+    king = position.kingSquare[us]
+    checkers, pinned, pinLines = checkersAndPins(position)
+
+    # the king may not step back along the line of a sliding checker, which the attack map cannot see past the king
+    kingTargets = KING_ATTACKS[king] & notOurs & ~position.attacks[them]
+    if capturesOnly:
+        kingTargets &= enemy[0]
+    sliders = checkers & (enemy[BISHOP] | enemy[ROOK] | enemy[QUEEN])
+    while sliders:
+        low = sliders & -sliders
+        kingTargets &= ~(LINE[king][low.bit_length() - 1] ^ low)
+        sliders ^= low
+    _addPieceMoves(king, kingTargets, append)
+    if checkers & (checkers - 1):
+        return moves
+
+    if checkers:
+        targetMask = checkers | BETWEEN[king][checkers.bit_length() - 1]
+    else:
+        targetMask = FULL
+        if not capturesOnly:
+            _addCastlingMoves(position, us, occupied, moves)
+
+    empty = FULL ^ occupied
+    captures = enemy[0] & targetMask
+    pawns = own[PAWN]
+    pushMask = RANK_1 | RANK_8 if capturesOnly else FULL
+    if us == WHITE:
+        single = north(pawns) & empty
+        _addPawnMoves(single & targetMask & pushMask, 8, RANK_8, pinned, pinLines, moves)
+        if not capturesOnly:
+            _addPawnMoves(north(single & RANK_3) & empty & targetMask, 16, 0, pinned, pinLines, moves)
+        _addPawnMoves(northEast(pawns) & captures, 9, RANK_8, pinned, pinLines, moves)
+        _addPawnMoves(northWest(pawns) & captures, 7, RANK_8, pinned, pinLines, moves)
+    else:
+        single = south(pawns) & empty
+        _addPawnMoves(single & targetMask & pushMask, -8, RANK_1, pinned, pinLines, moves)
+        if not capturesOnly:
+            _addPawnMoves(south(single & RANK_6) & empty & targetMask, -16, 0, pinned, pinLines, moves)
+        _addPawnMoves(southEast(pawns) & captures, -7, RANK_1, pinned, pinLines, moves)
+        _addPawnMoves(southWest(pawns) & captures, -9, RANK_1, pinned, pinLines, moves)
+    if position.epSquare != NO_SQUARE:
+        _addEnPassantMoves(position, us, king, moves)
+
+    targetMask &= enemy[0] if capturesOnly else notOurs
+    for fromSquare in squares(own[KNIGHT] & ~pinned):
+        _addPieceMoves(fromSquare, KNIGHT_ATTACKS[fromSquare] & targetMask, append)
+    for fromSquare in squares(own[BISHOP] | own[QUEEN]):
+        targets = bishopAttacksFrom(fromSquare, occupied) & targetMask
+        if pinned >> fromSquare & 1: targets &= pinLines[fromSquare]
+        _addPieceMoves(fromSquare, targets, append)
+    for fromSquare in squares(own[ROOK] | own[QUEEN]):
+        targets = rookAttacksFrom(fromSquare, occupied) & targetMask
+        if pinned >> fromSquare & 1: targets &= pinLines[fromSquare]
+        _addPieceMoves(fromSquare, targets, append)
+    return moves
+
+def _addEnPassantMoves(position, us: int, king: int, moves: list) -> None:
+    # en passant empties two squares on possibly the same line, so test the resulting occupancy directly
+    epSquare = position.epSquare
+    victim = epSquare - 8 if us == WHITE else epSquare + 8
+    for fromSquare in squares(position.pieces[us][PAWN] & (west(1 << victim) | east(1 << victim))):
+        occupied = position.occupied ^ (1 << fromSquare | 1 << victim | 1 << epSquare)
+        if position.attackersOf(king, us ^ 1, occupied) & occupied: continue
+        moves.append(fromSquare | epSquare << 6)
+
+def _addCastlingMoves(position, us: int, occupied: int, moves: list) -> None:
+    if us == WHITE:
+        kingside, queenside, home = WHITE_KINGSIDE, WHITE_QUEENSIDE, 4
+    else:
+        kingside, queenside, home = BLACK_KINGSIDE, BLACK_QUEENSIDE, 60
+    if not position.castling & (kingside | queenside) or position.kingSquare[us] != home: return
+    attacked = position.attacks[us ^ 1]
+    rooks = position.pieces[us][ROOK]
+
+    if position.castling & kingside and rooks >> (home + 3) & 1 and not (occupied | attacked) & (0b11 << (home + 1)):
+        moves.append(home | (home + 2) << 6)
+    if (position.castling & queenside and rooks >> (home - 4) & 1 and not occupied & (0b111 << (home - 3))
+            and not attacked & (0b11 << (home - 2))):
+        moves.append(home | (home - 2) << 6)
@@ -0,0 +1,65 @@
+from chess.constants import EMPTY, PAWN, QUEEN
+
+MAX_PLY = 128
+
+TT_MOVE_SCORE = 1 << 30
+CAPTURE_SCORE = 1 << 28
+PROMOTION_SCORE = 1 << 27
+KILLER_SCORES = (1 << 26, (1 << 26) - 1)
+HISTORY_LIMIT = 1 << 24
+
+# most valuable victim first, least valuable attacker breaking ties; kings attack last
+MVV_LVA = [[0] * 7 for _ in range(7)]
+for _victim in range(1, 7):
+    for _attacker in range(1, 7):
+        MVV_LVA[_victim][_attacker] = _victim * 8 - _attacker
+
+def isCapture(position, move: int) -> bool:
+    toSquare = (move >> 6) & 63
+    return position.board[toSquare] != EMPTY or (toSquare == position.epSquare and position.board[move & 63] & 7 == PAWN)
+
+class MoveOrderer:
+    def __init__(self):
+        self.killers = [[0, 0] for _ in range(MAX_PLY)]
+        # history[color * 4096 + from * 64 + to] counts how often a quiet move caused a cutoff
+        self.history = [0] * (2 * 64 * 64)
+
+    def newSearch(self) -> None:
+        for killers in self.killers:
+            killers[0] = killers[1] = 0
+        history = self.history
+        for index in range(len(history)):
+            history[index] >>= 1
+
+    def scoreMove(self, position, move: int, ttMove: int, ply: int) -> int:
+        if move == ttMove: return TT_MOVE_SCORE
+        board = position.board
+        toSquare = (move >> 6) & 63
+        victim = board[toSquare] & 7
+        attacker = board[move & 63] & 7
+        if victim or (toSquare == position.epSquare and attacker == PAWN):
+            return CAPTURE_SCORE + MVV_LVA[victim or PAWN][attacker] + (move >> 12 == QUEEN)
+        if move >> 12 == QUEEN: return PROMOTION_SCORE
+        if ply < MAX_PLY:
+            killers = self.killers[ply]
+            if move == killers[0]: return KILLER_SCORES[0]
+            if move == killers[1]: return KILLER_SCORES[1]
+        return self.history[position.sideToMove << 12 | (move & 0xFFF)]
+
+    def orderMoves(self, position, moves: list, ttMove: int, ply: int) -> list:
+        scoreMove = self.scoreMove
+        scored = [(scoreMove(position, move, ttMove, ply), move) for move in moves]
+        scored.sort(reverse=True)
+        return [move for _, move in scored]
+
+    def recordCutoff(self, position, move: int, depth: int, ply: int) -> None:
+        if isCapture(position, move): return
+        if ply < MAX_PLY:
+            killers = self.killers[ply]
+            if killers[0] != move:
+                killers[1] = killers[0]
+                killers[0] = move
+        index = position.sideToMove << 12 | (move & 0xFFF)
+        self.history[index] += depth * depth
+        if self.history[index] > HISTORY_LIMIT:
+            self.history = [value >> 1 for value in self.history]
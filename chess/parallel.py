@@ -0,0 +1,120 @@
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+from chess.position import Position
+from chess.compact import snapshotWithHistory, restoreWithHistory
+from chess.search import Searcher, MAX_DEPTH, MATE_SCORE, INFINITY, isMateScore
+from chess.ordering import MoveOrderer
+from chess.transposition import TranspositionTable
+from chess.tablebase import Tablebase
+
+# each worker process keeps one Searcher attached to the shared table, so its killers and history
+# survive from one iteration to the next
+_workerSearcher = None
+
+def _initWorker(ttSizeMB: float, ttName: str, useOrdering: bool, tablebaseDirectory: str) -> None:
+    global _workerSearcher
+    tablebase = Tablebase(tablebaseDirectory) if tablebaseDirectory else None
+    _workerSearcher = Searcher(useOrdering=useOrdering, tt=TranspositionTable(ttSizeMB, name=ttName), tablebase=tablebase)
+
+def _searchMoves(packed: bytes, moves: list, depth: int, maxTime: float, maxNodes: int, newSearch: bool, alpha: int, age: int) -> tuple:
+    _workerSearcher.tt.age = age
+    return _workerSearcher.searchMoves(restoreWithHistory(packed), moves, depth, maxTime, maxNodes, newSearch, alpha)
+
+class ParallelSearcher:
+    # iterative deepening where each iteration splits the root moves across a pool of worker processes;
+    # all workers read and write one table in shared memory, so its size does not grow with the pool.
+    # Each worker opens its own view of the endgame tables in tablebaseDirectory, if one is given
+    def __init__(self, workers: int, ttSizeMB: float = 16, useOrdering: bool = True, tablebaseDirectory: str = None):
+        self.workers = workers
+        self.useOrdering = useOrdering
+        self.tt = TranspositionTable(ttSizeMB, shared=True)
+        self.pool = ProcessPoolExecutor(max_workers=workers, initializer=_initWorker, initargs=(ttSizeMB, self.tt.name, useOrdering, tablebaseDirectory))
+        self.orderer = MoveOrderer()
+        self.nodes = 0
+        # (depth, score, bestMove, nodes, seconds) for every finished iteration of the last search
+        self.iterations = []
+
+    def close(self) -> None:
+        self.pool.shutdown()
+        self.tt.close()
+
+    def search(self, position: Position, maxTime: float = 1.0, maxDepth: int = MAX_DEPTH, maxNodes: int = None) -> tuple:
+        # returns (bestMove, score, depth) like Searcher.search
+        self.nodes = 0
+        self.iterations = []
+        start = perf_counter()
+        self.tt.newSearch()
+        rootMoves = position.legalMoves()
+        if not rootMoves:
+            return None, -MATE_SCORE if position.inCheck() else 0, 0
+        if self.useOrdering:
+            rootMoves = self.orderer.orderMoves(position, rootMoves, 0, 0)
+        bestMove, bestScore, completedDepth = rootMoves[0], 0, 0
+
+        for depth in range(1, maxDepth + 1):
+            remainingTime = maxTime - (perf_counter() - start) if maxTime is not None else None
+            remainingNodes = maxNodes - self.nodes if maxNodes is not None else None
+            if (remainingTime is not None and remainingTime <= 0) or (remainingNodes is not None and remainingNodes <= 0):
+                break
+            result = self._searchIteration(position, rootMoves, depth, remainingTime, remainingNodes)
+            if result is None:
+                break
+            bestScore, bestMove = result
+            completedDepth = depth
+            self.iterations.append((depth, bestScore, bestMove, self.nodes, perf_counter() - start))
+            rootMoves.remove(bestMove)
+            rootMoves.insert(0, bestMove)
+            if isMateScore(bestScore) or len(rootMoves) == 1:
+                break
+        return bestMove, bestScore, completedDepth
+
+    def _searchIteration(self, position: Position, rootMoves: list, depth: int, maxTime: float, maxNodes: int) -> tuple:
+        # the previous best move is searched alone first, so the split moves get its score as a bound
+        # instead of each worker starting from an open window
+        start = perf_counter()
+        # workers get the position as a snapshot and the moves since its last irreversible move, not a pickle
+        packed = snapshotWithHistory(position)
+        first = self.pool.submit(_searchMoves, packed, rootMoves[:1], depth, maxTime, maxNodes, depth == 1, -INFINITY, self.tt.age).result()
+        if first is None:
+            return None
+        bestScore, bestMove, nodes = first
+        self.nodes += nodes
+        rest = rootMoves[1:]
+        if not rest:
+            return bestScore, bestMove
+
+        if maxTime is not None: maxTime -= perf_counter() - start
+        if maxNodes is not None: maxNodes -= nodes
+        # deal the ordered moves round-robin so every worker gets a share of the promising ones
+        shares = [rest[index::self.workers] for index in range(self.workers)]
+        shares = [share for share in shares if share]
+        nodeShare = maxNodes // len(shares) if maxNodes is not None else None
+        futures = [self.pool.submit(_searchMoves, packed, share, depth, maxTime, nodeShare, depth == 1, bestScore, self.tt.age) for share in shares]
+
+        aborted = False
+        for future in futures:
+            result = future.result()
+            if result is None:
+                aborted = True
+                continue
+            score, move, nodes = result
+            self.nodes += nodes
+            if score > bestScore:
+                bestScore, bestMove = score, move
+        return None if aborted else (bestScore, bestMove)
+
+def measureSpeedup(position: Position, depth: int, workerCounts: tuple = (1, 2, 4, 8, 16), ttSizeMB: float = 16) -> list:
+    # times a fixed-depth search for each pool size; returns (workers, seconds, nodes, bestMove, speedup) rows
+    rows = []
+    for workers in workerCounts:
+        searcher = ParallelSearcher(workers, ttSizeMB)
+        try:
+            # start the worker processes before the clock runs
+            searcher.search(position.copy(), None, 1)
+            start = perf_counter()
+            move, score, _ = searcher.search(position.copy(), None, depth)
+            seconds = perf_counter() - start
+        finally:
+            searcher.close()
+        rows.append((workers, seconds, searcher.nodes, move, rows[0][1] / seconds if rows else 1.0))
+    return rows
@@ -0,0 +1,93 @@
+from time import perf_counter
+from chess.position import Position, moveToUci
+from chess.fen import parseFen, STARTING_FEN
+
+# reference positions with their published node counts
+PERFT_SUITE = [
+    ("start", STARTING_FEN,
+        [(1, 20), (2, 400), (3, 8902), (4, 197281), (5, 4865609)]),
+    ("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+        [(1, 48), (2, 2039), (3, 97862), (4, 4085603)]),
+    ("endgame", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+        [(1, 14), (2, 191), (3, 2812), (4, 43238), (5, 674624)]),
+    ("promotions", "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+        [(1, 6), (2, 264), (3, 9467), (4, 422333)]),
+    ("promotions-mirrored", "r2q1rk1/pP1p2pp/Q4n2/bbp1p3/Np6/1B3NBn/pPPP1PPP/R3K2R b KQ - 0 1",
+        [(1, 6), (2, 264), (3, 9467), (4, 422333)]),
+    ("talkchess", "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+        [(1, 44), (2, 1486), (3, 62379), (4, 2103487)]),
+    ("middlegame", "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+        [(1, 46), (2, 2079), (3, 89890), (4, 3894594)]),
+    ("illegal-ep-1", "3k4/3p4/8/K1P4r/8/8/8/8 b - - 0 1", [(5, 185429), (6, 1134888)]),
+    ("illegal-ep-2", "8/8/4k3/8/2p5/8/B2P2K1/8 w - - 0 1", [(5, 135655), (6, 1015133)]),
+    ("ep-gives-check", "8/8/1k6/2b5/2pP4/8/5K2/8 b - d3 0 1", [(5, 206379), (6, 1440467)]),
+    ("short-castle-check", "5k2/8/8/8/8/8/8/4K2R w K - 0 1", [(5, 120330), (6, 661072)]),
+    ("long-castle-check", "3k4/8/8/8/8/8/8/R3K3 w Q - 0 1", [(5, 141077), (6, 803711)]),
+    ("castle-rights", "r3k2r/1b4bq/8/8/8/8/7B/R3K2R w KQkq - 0 1", [(3, 27826), (4, 1274206)]),
+    ("castle-prevented", "r3k2r/8/3Q4/8/8/5q2/8/R3K2R b KQkq - 0 1", [(3, 50509), (4, 1720476)]),
+    ("promote-out-of-check", "2K2r2/4P3/8/8/8/8/8/3k4 w - - 0 1", [(5, 266199), (6, 3821001)]),
+    ("discovered-check", "8/8/1P2K3/8/2n5/1q6/8/5k2 b - - 0 1", [(4, 31961), (5, 1004658)]),
+    ("promote-to-check", "4k3/1P6/8/8/8/8/K7/8 w - - 0 1", [(6, 217342)]),
+    ("underpromote-to-check", "8/P1k5/K7/8/8/8/8/8 w - - 0 1", [(6, 92683)]),
+    ("self-stalemate", "K1k5/8/P7/8/8/8/8/8 w - - 0 1", [(6, 2217)]),
+    ("stalemate-checkmate-1", "8/k1P5/8/1K6/8/8/8/8 w - - 0 1", [(6, 43261), (7, 567584)]),
+    ("stalemate-checkmate-2", "8/8/2k5/5q2/5n2/8/5K2/8 b - - 0 1", [(4, 23527)]),
+]
+
+def perft(position: Position, depth: int) -> int:
+    moves = position.legalMoves()
+    if depth <= 1:
+        return len(moves) if depth == 1 else 1
+    nodes = 0
+    for move in moves:
+        position.makeMove(move)
+        nodes += perft(position, depth - 1)
+        position.unmakeMove()
+    return nodes
+
+def divide(position: Position, depth: int) -> list:
+    results = []
+    for move in position.legalMoves():
+        position.makeMove(move)
+        results.append((move, perft(position, depth - 1)))
+        position.unmakeMove()
+    return results
+
+def runPerft(fen: str, depth: int, showDivide: bool = False) -> int:
+    position = parseFen(fen)
+    start = perf_counter()
+    if showDivide:
+        nodes = 0
+        for move, count in divide(position, depth):
+            print(moveToUci(move) + ":", count)
+            nodes += count
+        print()
+    else:
+        nodes = perft(position, depth)
+    elapsed = perf_counter() - start
+    print("Nodes:", nodes)
+    print("Time: %.3fs" % elapsed)
+    print("NPS:", int(nodes / elapsed) if elapsed > 0 else nodes)
+    return nodes
+
+def runSuite(maxNodes: int = 500000) -> bool:
+    allPassed = True
+    totalNodes = 0
+    totalTime = 0.0
+    for name, fen, expectations in PERFT_SUITE:
+        position = parseFen(fen)
+        for depth, expected in expectations:
+            if expected > maxNodes:
+                print("%-22s depth %d  skipped (expected %d > max-nodes)" % (name, depth, expected))
+                break
+            start = perf_counter()
+            nodes = perft(position, depth)
+            elapsed = perf_counter() - start
+            totalNodes += nodes
+            totalTime += elapsed
+            passed = nodes == expected
+            allPassed = allPassed and passed
+            print("%-22s depth %d  %10d  %-4s %8.3fs" % (name, depth, nodes, "ok" if passed else "FAIL (expected %d)" % expected, elapsed))
+    print("Total nodes:", totalNodes)
+    print("NPS:", int(totalNodes / totalTime) if totalTime > 0 else totalNodes)
+    return allPassed
@@ -0,0 +1,186 @@
+import os
+import re
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from time import perf_counter
+from chess.fen import STARTING_FEN, InvalidFen, parseFen, toFen
+from chess.san import InvalidSan, parseSan
+
+# large reads keep the per-byte cost in C; only one game and one partial line are held at a time
+CHUNK_SIZE = 1 << 22
+# parallel validation hands out about this many bytes of whole games per task
+SHARD_BYTES = 1 << 20
+PROGRESS_EVERY = 1000
+
+HEADER_PATTERN = re.compile(r'\[\s*(\w+)\s+"((?:[^"\\]|\\.)*)"\s*\]')
+# comments, variations, NAGs and move numbers are matched only to be skipped; anything else is a move or a result
+TOKEN_PATTERN = re.compile(r"\{[^}]*\}|;[^\n]*|[()]|\$\d+|\d+\.+|[^\s(){};]+")
+RESULTS = ("1-0", "0-1", "1/2-1/2", "*")
+RESULT_ENDINGS = tuple(result.encode() for result in RESULTS)
+
+class PgnGame:
+    def __init__(self, offset: int, headers: dict, valid: bool, plies: int, fen: str, error: str, result: str = None):
+        # offset is where the game starts in its file; fen is the final position, or the one the first bad move was played in.
+        # result is the Result tag, or failing that the result token closing the movetext, or None
+        self.offset = offset
+        self.headers = headers
+        self.valid = valid
+        self.plies = plies
+        self.fen = fen
+        self.error = error
+        self.result = result
+
+def _readLines(stream, chunkSize: int):
+    pending = b""
+    while True:
+        chunk = stream.read(chunkSize)
+        if not chunk: break
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        yield from lines
+    if pending:
+        yield pending
+
+def splitGames(stream, chunkSize: int = CHUNK_SIZE, offset: int = 0):
+    # yields (offset, text) for every game in a binary stream; a game ends at a result token closing a
+    # movetext line or where the next tag section starts. offset is the stream position on entry
+    lines = []
+    start = offset
+    inMovetext = False
+    for line in _readLines(stream, chunkSize):
+        if inMovetext and line[:1] == b"[":
+            yield start, b"\n".join(lines)
+            lines = []
+            inMovetext = False
+        stripped = line.strip()
+        if stripped:
+            if not lines:
+                start = offset
+            lines.append(line)
+            if line[:1] != b"[":
+                inMovetext = True
+                if stripped.endswith(RESULT_ENDINGS):
+                    yield start, b"\n".join(lines)
+                    lines = []
+                    inMovetext = False
+        offset += len(line) + 1
+    if lines:
+        yield start, b"\n".join(lines)
+
+def validateGame(text: bytes, offset: int = 0, visit=None) -> PgnGame:
+    # replays the movetext from the FEN tag or the starting position, stopping at the first move that is not legal;
+    # visit(position, move), when given, sees every legal move just before it is made
+    headers = {}
+    movetext = []
+    for line in text.decode("latin-1").split("\n"):
+        if line[:1] == "[":
+            match = HEADER_PATTERN.match(line)
+            if match: headers[match.group(1)] = match.group(2)
+        else:
+            movetext.append(line)
+
+    fen = headers.get("FEN", STARTING_FEN)
+    result = headers.get("Result")
+    try:
+        position = parseFen(fen)
+    except InvalidFen:
+        return PgnGame(offset, headers, False, 0, fen, "invalid FEN tag", result)
+
+    plies = 0
+    variationDepth = 0
+    for token in TOKEN_PATTERN.findall("\n".join(movetext)):
+        first = token[0]
+        if first == "(":
+            variationDepth += 1
+        elif first == ")":
+            variationDepth -= 1
+        elif variationDepth or first in "{;$" or token[-1] == ".":
+            continue
+        elif token in RESULTS:
+            if result is None: result = token
+            break
+        else:
+            try:
+                move = parseSan(position, token)
+            except InvalidSan:
+                return PgnGame(offset, headers, False, plies, toFen(position), "illegal move %s at ply %d" % (token, plies + 1), result)
+            if visit is not None:
+                visit(position, move)
+            position.makeMove(move)
+            plies += 1
+    return PgnGame(offset, headers, True, plies, toFen(position), None, result)
+
+def readGames(stream, chunkSize: int = CHUNK_SIZE, visit=None):
+    for offset, text in splitGames(stream, chunkSize):
+        yield validateGame(text, offset, visit)
+
+def readPgn(path: str, chunkSize: int = CHUNK_SIZE, visit=None):
+    with open(path, "rb") as stream:
+        yield from readGames(stream, chunkSize, visit)
+
+def _nextGameStart(stream, position: int, size: int) -> int:
+    # the first tag line at or after position that follows a blank or movetext line, i.e. where a game's tags begin
+    stream.seek(position)
+    if position:
+        stream.readline()
+    offset = stream.tell()
+    seenBody = False
+    for line in stream:
+        if line[:1] == b"[":
+            if seenBody: return offset
+        else:
+            seenBody = True
+        offset += len(line)
+    return size
+
+def shardRanges(path: str, shardBytes: int = SHARD_BYTES):
+    # yields (start, end) byte ranges of roughly shardBytes that begin and end on game boundaries;
+    # a file whose games carry no tags has no boundaries to find and stays one range
+    size = os.path.getsize(path)
+    start = 0
+    with open(path, "rb") as stream:
+        while start < size:
+            end = _nextGameStart(stream, start + shardBytes, size) if start + shardBytes < size else size
+            yield start, end
+            start = end
+
+def validateShard(path: str, start: int, end: int) -> list:
+    with open(path, "rb") as stream:
+        stream.seek(start)
+        data = stream.read(end - start)
+    return [validateGame(text, offset) for offset, text in splitGames(BytesIO(data), len(data), start)]
+
+def readPgnParallel(path: str, workers: int, shardBytes: int = SHARD_BYTES):
+    # the same games as readPgn, in file order, validated by a pool of processes; at most two shards
+    # per worker are in flight, so memory stays bounded whatever the file size
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for start, end in shardRanges(path, shardBytes):
+            pending.append(pool.submit(validateShard, path, start, end))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+def runValidation(path: str, quiet: bool = False, workers: int = 1) -> int:
+    # prints one line per game unless quiet, then totals, with progress on stderr; returns how many games were invalid
+    games = invalid = 0
+    start = perf_counter()
+    for game in readPgn(path) if workers <= 1 else readPgnParallel(path, workers):
+        games += 1
+        if not game.valid: invalid += 1
+        if not quiet:
+            status = "valid" if game.valid else "invalid (%s)" % game.error
+            print("%10d  %4d plies  %s  %s" % (game.offset, game.plies, game.fen, status))
+        if games % PROGRESS_EVERY == 0:
+            seconds = perf_counter() - start
+            sys.stderr.write("\r%d games  %.0f games/s" % (games, games / seconds))
+            sys.stderr.flush()
+    if games >= PROGRESS_EVERY:
+        sys.stderr.write("\n")
+    seconds = perf_counter() - start
+    print("Games: %d  valid: %d  invalid: %d" % (games, games - invalid, invalid))
+    print("Time: %.3fs  (%.0f games/s)" % (seconds, games / seconds if seconds > 0 else 0))
+    return invalid
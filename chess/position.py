@@ -0,0 +1,448 @@
+from array import array
+from chess.constants import *
+from chess.tables import PAWN_ATTACKS, KNIGHT_ATTACKS, KING_ATTACKS, bishopAttacksFrom, rookAttacksFrom
+from chess.movegen import generateLegalMoves
+from chess.zobrist import PIECE_KEYS, CASTLING_KEYS, EP_FILE_KEYS, SIDE_KEY
+from chess.evaluate import MIDDLEGAME, ENDGAME, PIECE_PHASE
+
+# the undo and key stacks start this deep and double whenever a line outgrows them
+INITIAL_STACK = 32
+
+class InvalidSquareName(Exception): pass
+class InvalidMove(Exception): pass
+class NoMoveToUnmake(Exception): pass
+
+def makePiece(color: int, pieceType: int) -> int:
+    return pieceType | color << 3
+
+def pieceColor(piece: int) -> int:
+    return piece >> 3
+
+def pieceType(piece: int) -> int:
+    return piece & 7
+
+def squareIndex(file: int, rank: int) -> int:
+    return rank * 8 + file
+
+def squareName(square: int) -> str:
+    return FILES[square & 7] + str((square >> 3) + 1)
+
+def parseSquare(name: str) -> int:
+    if len(name) != 2 or name[0] not in FILES or name[1] not in "12345678":
+        raise InvalidSquareName
+    return FILES.index(name[0]) + (int(name[1]) - 1) * 8
+
+def encodeMove(fromSquare: int, toSquare: int, promotion: int = 0) -> int:
+    return fromSquare | toSquare << 6 | promotion << 12
+
+def moveFrom(move: int) -> int:
+    return move & 63
+
+def moveTo(move: int) -> int:
+    return (move >> 6) & 63
+
+def movePromotion(move: int) -> int:
+    return move >> 12
+
+def moveToUci(move: int) -> str:
+    uci = squareName(moveFrom(move)) + squareName(moveTo(move))
+    if movePromotion(move):
+        uci += PIECE_LETTERS[movePromotion(move)]
+    return uci
+
+def parseUciMove(text: str) -> int:
+    try:
+        promotion = PIECE_LETTERS.index(text[4]) if len(text) == 5 else 0
+    except ValueError:
+        raise InvalidMove
+    return encodeMove(parseSquare(text[0:2]), parseSquare(text[2:4]), promotion)
+
+def swapSide(color: int) -> int:
+    return color ^ 1
+
+class Position:
+    __slots__ = ("board", "pieces", "occupied", "sideToMove", "castling", "epSquare", "halfmoveClock", "fullmoveNumber",
+        "kingSquare", "attacksFrom", "attackCounts", "attacks", "middlegameScore", "endgameScore", "phase",
+        "undoStack", "keyStack", "ply", "key")
+
+    def __init__(self):
+        self.board = bytearray([EMPTY] * 64)
+        # pieces[color][pieceType] is an occupancy mask, pieces[color][0] holds every piece of that color
+        self.pieces = [[0] * 7, [0] * 7]
+        self.occupied = 0
+        self.sideToMove = WHITE
+        self.castling = 0
+        self.epSquare = NO_SQUARE
+        self.halfmoveClock = 0
+        self.fullmoveNumber = 1
+        self.kingSquare = [NO_SQUARE, NO_SQUARE]
+        # attacksFrom[color][square] is what a piece of that color on square attacks,
+        # attackCounts[color][square] how many of them hit square and attacks[color] the union
+        self.attacksFrom = [[0] * 64, [0] * 64]
+        self.attackCounts = [[0] * 64, [0] * 64]
+        self.attacks = [0, 0]
+        # White-relative piece-square sums and game phase, kept current by every piece placement
+        self.middlegameScore = 0
+        self.endgameScore = 0
+        self.phase = 0
+        # one packed int per made move: move | captured << 16 | castling << 20 | (epSquare + 1) << 24 | halfmoveClock << 31
+        self.undoStack = array("Q", bytes(8 * INITIAL_STACK))
+        # keyStack[ply] is the Zobrist key of the position before the move made at that ply
+        self.keyStack = array("Q", bytes(8 * INITIAL_STACK))
+        self.ply = 0
+        self.key = self.computeKey()
+
+    @classmethod
+    def startingPosition(cls) -> "Position":
+        position = cls()
+        backRank = [ROOK, KNIGHT, BISHOP, QUEEN, KING, BISHOP, KNIGHT, ROOK]
+        position.setBoard([makePiece(WHITE, kind) for kind in backRank] + [makePiece(WHITE, PAWN)] * 8 + [EMPTY] * 32
+            + [makePiece(BLACK, PAWN)] * 8 + [makePiece(BLACK, kind) for kind in backRank])
+        position.castling = ALL_CASTLING
+        position.key = position.computeKey()
+        return position
+
+    def copy(self) -> "Position":
+        other = Position()
+        other.board = self.board[:]
+        other.pieces = [self.pieces[WHITE][:], self.pieces[BLACK][:]]
+        other.occupied = self.occupied
+        other.sideToMove = self.sideToMove
+        other.castling = self.castling
+        other.epSquare = self.epSquare
+        other.halfmoveClock = self.halfmoveClock
+        other.fullmoveNumber = self.fullmoveNumber
+        other.kingSquare = self.kingSquare[:]
+        other.attacksFrom = [self.attacksFrom[WHITE][:], self.attacksFrom[BLACK][:]]
+        other.attackCounts = [self.attackCounts[WHITE][:], self.attackCounts[BLACK][:]]
+        other.attacks = self.attacks[:]
+        other.key = self.key
+        other.middlegameScore = self.middlegameScore
+        other.endgameScore = self.endgameScore
+        other.phase = self.phase
+        return other
+
+    def pieceAt(self, square: int) -> int:
+        return self.board[square]
+
+    def setPiece(self, square: int, piece: int) -> None:
+        self._put(square, piece)
+        self._updateAttacks(1 << square)
+
+    def setBoard(self, board: list) -> None:
+        # places a whole 64-square mailbox at once and rebuilds the attack map once rather than per piece
+        for square in range(64):
+            piece = board[square]
+            if piece != self.board[square]:
+                if piece == EMPTY: self._remove(square)
+                else: self._put(square, piece)
+        self._rebuildAttacks()
+
+    def removePiece(self, square: int) -> None:
+        self._remove(square)
+        self._updateAttacks(1 << square)
+
+    def _put(self, square: int, piece: int) -> None:
+        if self.board[square] != EMPTY:
+            self._remove(square)
+        mask = 1 << square
+        own = self.pieces[piece >> 3]
+        self.board[square] = piece
+        own[piece & 7] |= mask
+        own[0] |= mask
+        self.occupied |= mask
+        self.key ^= PIECE_KEYS[piece][square]
+        self.middlegameScore += MIDDLEGAME[piece][square]
+        self.endgameScore += ENDGAME[piece][square]
+        self.phase += PIECE_PHASE[piece]
+        if piece & 7 == KING:
+            self.kingSquare[piece >> 3] = square
+
+    def _remove(self, square: int) -> None:
+        piece = self.board[square]
+        if piece == EMPTY: return
+        mask = 1 << square
+        own = self.pieces[piece >> 3]
+        self.board[square] = EMPTY
+        own[piece & 7] ^= mask
+        own[0] ^= mask
+        self.occupied ^= mask
+        self.key ^= PIECE_KEYS[piece][square]
+        self.middlegameScore -= MIDDLEGAME[piece][square]
+        self.endgameScore -= ENDGAME[piece][square]
+        self.phase -= PIECE_PHASE[piece]
+
+    def _move(self, fromSquare: int, toSquare: int, piece: int) -> None:
+        mask = 1 << fromSquare | 1 << toSquare
+        own = self.pieces[piece >> 3]
+        self.board[fromSquare] = EMPTY
+        self.board[toSquare] = piece
+        own[piece & 7] ^= mask
+        own[0] ^= mask
+        self.occupied ^= mask
+        keys = PIECE_KEYS[piece]
+        self.key ^= keys[fromSquare] ^ keys[toSquare]
+        middlegame, endgame = MIDDLEGAME[piece], ENDGAME[piece]
+        self.middlegameScore += middlegame[toSquare] - middlegame[fromSquare]
+        self.endgameScore += endgame[toSquare] - endgame[fromSquare]
+
+    def _epKey(self) -> int:
+        # the en-passant file only distinguishes positions where the side to move can actually capture
+        epSquare = self.epSquare
+        if epSquare == NO_SQUARE: return 0
+        us = self.sideToMove
+        if PAWN_ATTACKS[us ^ 1][epSquare] & self.pieces[us][PAWN]:
+            return EP_FILE_KEYS[epSquare & 7]
+        return 0
+
+    def computeKey(self) -> int:
+        key = CASTLING_KEYS[self.castling] ^ self._epKey()
+        if self.sideToMove == BLACK:
+            key ^= SIDE_KEY
+        for square in range(64):
+            key ^= PIECE_KEYS[self.board[square]][square]
+        return key
+
+    def repetitionCount(self) -> int:
+        count = 1
+        ply = self.ply - 2
+        stop = max(self.ply - self.halfmoveClock, 0)
+        while ply >= stop:
+            if self.keyStack[ply] == self.key:
+                count += 1
+            ply -= 2
+        return count
+
+    def _pieceAttacks(self, square: int, piece: int) -> int:
+        kind = piece & 7
+        if kind == PAWN: return PAWN_ATTACKS[piece >> 3][square]
+        if kind == KNIGHT: return KNIGHT_ATTACKS[square]
+        if kind == KING: return KING_ATTACKS[square]
+        if kind == BISHOP: return bishopAttacksFrom(square, self.occupied)
+        if kind == ROOK: return rookAttacksFrom(square, self.occupied)
+        return bishopAttacksFrom(square, self.occupied) | rookAttacksFrom(square, self.occupied)
+
+    def _setAttacks(self, color: int, square: int, attacks: int) -> None:
+        attacksFrom = self.attacksFrom[color]
+        old = attacksFrom[square]
+        if old == attacks: return
+        attacksFrom[square] = attacks
+        counts = self.attackCounts[color]
+        union = self.attacks[color]
+        removed = old & ~attacks
+        while removed:
+            low = removed & -removed
+            target = low.bit_length() - 1
+            counts[target] -= 1
+            if counts[target] == 0: union ^= low
+            removed ^= low
+        added = attacks & ~old
+        while added:
+            low = added & -added
+            target = low.bit_length() - 1
+            if counts[target] == 0: union |= low
+            counts[target] += 1
+            added ^= low
+        self.attacks[color] = union
+
+    def _updateAttacks(self, changed: int) -> None:
+        # only the pieces on changed squares and the sliders whose rays reach one of them can attack differently
+        board = self.board
+        white, black = self.pieces
+        for color, own in ((WHITE, white), (BLACK, black)):
+            attacksFrom = self.attacksFrom[color]
+            sliders = (own[BISHOP] | own[ROOK] | own[QUEEN]) & ~changed
+            while sliders:
+                low = sliders & -sliders
+                square = low.bit_length() - 1
+                if attacksFrom[square] & changed:
+                    self._setAttacks(color, square, self._pieceAttacks(square, board[square]))
+                sliders ^= low
+
+        while changed:
+            low = changed & -changed
+            square = low.bit_length() - 1
+            piece = board[square]
+            if piece == EMPTY:
+                self._setAttacks(WHITE, square, 0)
+                self._setAttacks(BLACK, square, 0)
+            else:
+                self._setAttacks(piece >> 3, square, self._pieceAttacks(square, piece))
+                self._setAttacks(piece >> 3 ^ 1, square, 0)
+            changed ^= low
+
+    def _rebuildAttacks(self) -> None:
+        board = self.board
+        for color in (WHITE, BLACK):
+            attacksFrom = [0] * 64
+            counts = [0] * 64
+            union = 0
+            pieces = self.pieces[color][0]
+            while pieces:
+                low = pieces & -pieces
+                square = low.bit_length() - 1
+                attacks = self._pieceAttacks(square, board[square])
+                attacksFrom[square] = attacks
+                union |= attacks
+                while attacks:
+                    target = attacks & -attacks
+                    counts[target.bit_length() - 1] += 1
+                    attacks ^= target
+                pieces ^= low
+            self.attacksFrom[color] = attacksFrom
+            self.attackCounts[color] = counts
+            self.attacks[color] = union
+
+    def attackersOf(self, square: int, byColor: int, occupied: int) -> int:
+        pieces = self.pieces[byColor]
+        queens = pieces[QUEEN]
+        return ((PAWN_ATTACKS[byColor ^ 1][square] & pieces[PAWN])
+            | (KNIGHT_ATTACKS[square] & pieces[KNIGHT])
+            | (KING_ATTACKS[square] & pieces[KING])
+            | (bishopAttacksFrom(square, occupied) & (pieces[BISHOP] | queens))
+            | (rookAttacksFrom(square, occupied) & (pieces[ROOK] | queens)))
+
+    def isSquareAttacked(self, square: int, byColor: int) -> bool:
+        return self.attacks[byColor] >> square & 1 == 1
+
+    def kingInCheck(self, color: int) -> bool:
+        return self.attacks[color ^ 1] & self.pieces[color][KING] != 0
+
+    def inCheck(self) -> bool:
+        return self.kingInCheck(self.sideToMove)
+
+    def legalMoves(self) -> list:
+        return generateLegalMoves(self)
+
+    def legalCaptures(self) -> list:
+        return generateLegalMoves(self, capturesOnly=True)
+
+    def legalMovesFrom(self, square: int) -> list:
+        return [move for move in generateLegalMoves(self) if move & 63 == square]
+
+    def findMove(self, fromSquare: int, toSquare: int, promotion: int = QUEEN) -> int:
+        for move in self.legalMovesFrom(fromSquare):
+            if moveTo(move) == toSquare and movePromotion(move) in (0, promotion):
+                return move
+        return None
+
+    def makeMove(self, move: int) -> None:
+        board = self.board
+        fromSquare, toSquare, promotion = move & 63, (move >> 6) & 63, move >> 12
+        piece = board[fromSquare]
+        captured = board[toSquare]
+        kind = piece & 7
+        us = piece >> 3
+
+        if self.ply == len(self.undoStack):
+            self.undoStack.extend([0] * len(self.undoStack))
+            self.keyStack.extend([0] * len(self.keyStack))
+        self.undoStack[self.ply] = (move | captured << 16 | self.castling << 20
+            | (self.epSquare + 1) << 24 | self.halfmoveClock << 31)
+        self.keyStack[self.ply] = self.key
+        self.ply += 1
+        self.key ^= CASTLING_KEYS[self.castling] ^ self._epKey() ^ SIDE_KEY
+
+        if captured != EMPTY:
+            self._remove(toSquare)
+        self._move(fromSquare, toSquare, piece)
+        changed = 1 << fromSquare | 1 << toSquare
+        epSquare = NO_SQUARE
+
+        if kind == PAWN:
+            if promotion:
+                self._put(toSquare, makePiece(us, promotion))
+            elif toSquare == self.epSquare:
+                victim = toSquare - 8 if us == WHITE else toSquare + 8
+                self._remove(victim)
+                changed |= 1 << victim
+            elif abs(toSquare - fromSquare) == 16:
+                epSquare = (fromSquare + toSquare) >> 1
+        elif kind == KING:
+            self.kingSquare[us] = toSquare
+            if toSquare - fromSquare == 2:
+                self._move(toSquare + 1, toSquare - 1, board[toSquare + 1])
+                changed |= 1 << (toSquare + 1) | 1 << (toSquare - 1)
+            elif fromSquare - toSquare == 2:
+                self._move(toSquare - 2, toSquare + 1, board[toSquare - 2])
+                changed |= 1 << (toSquare - 2) | 1 << (toSquare + 1)
+        self._updateAttacks(changed)
+
+        self.castling &= CASTLING_MASK[fromSquare] & CASTLING_MASK[toSquare]
+        self.epSquare = epSquare
+        self.halfmoveClock = 0 if kind == PAWN or captured != EMPTY else self.halfmoveClock + 1
+        if us == BLACK:
+            self.fullmoveNumber += 1
+        self.sideToMove = us ^ 1
+        self.key ^= CASTLING_KEYS[self.castling] ^ self._epKey()
+
+    def unmakeMove(self) -> int:
+        if self.ply == 0:
+            raise NoMoveToUnmake
+        self.ply -= 1
+        undo = self.undoStack[self.ply]
+        move = undo & 0xFFFF
+        captured = (undo >> 16) & 15
+        self.castling = (undo >> 20) & 15
+        self.epSquare = ((undo >> 24) & 127) - 1
+        self.halfmoveClock = undo >> 31
+
+        board = self.board
+        fromSquare, toSquare, promotion = move & 63, (move >> 6) & 63, move >> 12
+        piece = board[toSquare]
+        us = piece >> 3
+        kind = piece & 7
+
+        if promotion:
+            self._remove(toSquare)
+            self._put(fromSquare, makePiece(us, PAWN))
+        else:
+            self._move(toSquare, fromSquare, piece)
+        if captured != EMPTY:
+            self._put(toSquare, captured)
+        changed = 1 << fromSquare | 1 << toSquare
+
+        if kind == PAWN:
+            if toSquare == self.epSquare:
+                victim = toSquare - 8 if us == WHITE else toSquare + 8
+                self._put(victim, makePiece(us ^ 1, PAWN))
+                changed |= 1 << victim
+        elif kind == KING:
+            self.kingSquare[us] = fromSquare
+            if toSquare - fromSquare == 2:
+                self._move(toSquare - 1, toSquare + 1, board[toSquare - 1])
+                changed |= 1 << (toSquare + 1) | 1 << (toSquare - 1)
+            elif fromSquare - toSquare == 2:
+                self._move(toSquare + 1, toSquare - 2, board[toSquare + 1])
+                changed |= 1 << (toSquare - 2) | 1 << (toSquare + 1)
+        self._updateAttacks(changed)
+
+        if us == BLACK:
+            self.fullmoveNumber -= 1
+        self.sideToMove = us
+        self.key = self.keyStack[self.ply]
+        return move
+
+    def lastMove(self) -> int:
+        return self.undoStack[self.ply - 1] & 0xFFFF if self.ply else None
+
+    def moveList(self) -> list:
+        # every move made since the position was set up, oldest first
+        return [self.undoStack[ply] & 0xFFFF for ply in range(self.ply)]
+
+    def isCheckmate(self) -> bool:
+        return not self.legalMoves() and self.inCheck()
+
+    def isStalemate(self) -> bool:
+        return not self.legalMoves() and not self.inCheck()
+
+    def __str__(self) -> str:
+        rows = []
+        for rank in range(7, -1, -1):
+            row = ""
+            for file in range(8):
+                piece = self.board[rank * 8 + file]
+                letter = PIECE_LETTERS[piece & 7]
+                row += letter.upper() if piece != EMPTY and piece >> 3 == WHITE else letter
+            rows.append(row)
+        return "\n".join(rows)
@@ -0,0 +1,139 @@
+import heapq
+import mmap
+import os
+import shutil
+import tempfile
+from bisect import bisect_left
+from struct import Struct
+from chess.compact import restore
+from chess.gamelog import readArchive
+from chess.position import Position
+
+class InvalidPositionIndex(Exception): pass
+
+# layout: MAGIC, the entries sorted by key, the first key of every block of BLOCK_ENTRIES entries, then the FOOTER.
+# An entry is key:64 | gameId:32 | ply:16, big-endian, so comparing entries as integers orders them by key
+MAGIC = b"CPI\x01"
+ENTRY_BYTES = 14
+KEY = Struct(">Q")
+FOOTER = Struct(">QQI")
+BLOCK_ENTRIES = 4096
+# entries sorted in memory before being spilled to a run file; about 100 bytes each while held
+RUN_ENTRIES = 1 << 20
+READ_ENTRIES = 1 << 16
+
+def _writeRun(entries: list, path: str) -> None:
+    entries.sort()
+    with open(path, "wb") as out:
+        for start in range(0, len(entries), READ_ENTRIES):
+            out.write(b"".join(entry.to_bytes(ENTRY_BYTES, "big") for entry in entries[start:start + READ_ENTRIES]))
+
+def _readRun(path: str):
+    with open(path, "rb") as run:
+        while True:
+            data = run.read(ENTRY_BYTES * READ_ENTRIES)
+            if not data: break
+            for offset in range(0, len(data), ENTRY_BYTES):
+                yield int.from_bytes(data[offset:offset + ENTRY_BYTES], "big")
+
+def _archiveEntries(archivePath: str, maxPly: int):
+    # replays every archived game and yields one entry per position reached, the start included
+    for gameId, (start, moves, _) in enumerate(readArchive(archivePath)):
+        position = restore(start)
+        yield position.key << 48 | gameId << 16
+        for ply, move in enumerate(moves[:maxPly], 1):
+            position.makeMove(move)
+            yield position.key << 48 | gameId << 16 | ply
+
+def buildPositionIndex(archivePath: str, outPath: str, maxPly: int = None, runEntries: int = RUN_ENTRIES, blockEntries: int = BLOCK_ENTRIES) -> int:
+    # indexes every position of every game in a game archive, or only the first maxPly plies of each.
+    # Runs of runEntries are sorted in memory and spilled, then merged into the index, so memory stays
+    # bounded however many games there are. Returns the number of entries
+    runDirectory = tempfile.mkdtemp(prefix="index-runs-", dir=os.path.dirname(os.path.abspath(outPath)))
+    try:
+        runs = []
+        entries = []
+        for entry in _archiveEntries(archivePath, maxPly):
+            entries.append(entry)
+            if len(entries) >= runEntries:
+                runs.append(os.path.join(runDirectory, "%d.run" % len(runs)))
+                _writeRun(entries, runs[-1])
+                entries = []
+        entries.sort()
+        merged = heapq.merge(entries, *(_readRun(run) for run in runs))
+
+        count = 0
+        blockKeys = []
+        buffer = []
+        with open(outPath, "wb") as out:
+            out.write(MAGIC)
+            for entry in merged:
+                if count % blockEntries == 0:
+                    blockKeys.append(entry >> 48)
+                buffer.append(entry.to_bytes(ENTRY_BYTES, "big"))
+                count += 1
+                if len(buffer) == READ_ENTRIES:
+                    out.write(b"".join(buffer))
+                    buffer = []
+            out.write(b"".join(buffer))
+            indexOffset = out.tell()
+            out.write(b"".join(KEY.pack(key) for key in blockKeys))
+            out.write(FOOTER.pack(count, indexOffset, blockEntries))
+    finally:
+        shutil.rmtree(runDirectory)
+    return count
+
+class PositionIndex:
+    # answers "which games reached this key" with a bisection over the block keys, held in memory, and then
+    # one over a single block of the mapped entries
+    def __init__(self, path: str):
+        self.file = open(path, "rb")
+        size = os.fstat(self.file.fileno()).st_size
+        if size < len(MAGIC) + FOOTER.size:
+            self.file.close()
+            raise InvalidPositionIndex(path)
+        self.memory = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.count, indexOffset, self.blockEntries = FOOTER.unpack_from(self.memory, size - FOOTER.size)
+        blocks = (self.count + self.blockEntries - 1) // self.blockEntries
+        if self.memory[:len(MAGIC)] != MAGIC or indexOffset != len(MAGIC) + self.count * ENTRY_BYTES \
+                or indexOffset + 8 * blocks + FOOTER.size != size:
+            self.close()
+            raise InvalidPositionIndex(path)
+        self.blockKeys = [key for key, in KEY.iter_unpack(self.memory[indexOffset:indexOffset + 8 * blocks])]
+
+    def close(self) -> None:
+        self.memory.close()
+        self.file.close()
+
+    def _keyAt(self, index: int) -> int:
+        return KEY.unpack_from(self.memory, len(MAGIC) + index * ENTRY_BYTES)[0]
+
+    def _firstIndex(self, key: int) -> int:
+        # every block before the chosen one starts below key and the one after it does not,
+        # so the first entry at or above key lies inside it or at the next block's start
+        block = max(bisect_left(self.blockKeys, key) - 1, 0)
+        low = block * self.blockEntries
+        high = min(low + self.blockEntries, self.count)
+        while low < high:
+            middle = (low + high) >> 1
+            if self._keyAt(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def lookup(self, key: int, limit: int = None) -> list:
+        # (gameId, ply) for every indexed position with this key, by game then ply; at most limit of them
+        found = []
+        index = self._firstIndex(key)
+        memory = self.memory
+        while index < self.count and (limit is None or len(found) < limit):
+            offset = len(MAGIC) + index * ENTRY_BYTES
+            entry = int.from_bytes(memory[offset:offset + ENTRY_BYTES], "big")
+            if entry >> 48 != key: break
+            found.append(((entry >> 16) & 0xFFFFFFFF, entry & 0xFFFF))
+            index += 1
+        return found
+
+    def gamesWith(self, position: Position, limit: int = None) -> list:
+        return self.lookup(position.key, limit)
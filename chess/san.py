@@ -0,0 +1,43 @@
+import re
+from chess.constants import PAWN, PIECE_LETTERS
+from chess.position import Position, parseSquare
+
+class InvalidSan(Exception): pass
+
+SAN_PATTERN = re.compile(r"([NBRQK])?([a-h])?([1-8])?x?([a-h][1-8])(?:=?([NBRQ]))?")
+KINGSIDE_CASTLING = ("O-O", "0-0")
+QUEENSIDE_CASTLING = ("O-O-O", "0-0-0")
+
+def parseSan(position: Position, san: str) -> int:
+    # resolves standard algebraic notation against the legal moves; raises InvalidSan if none or several match
+    text = san.rstrip("+#!?")
+    if text in KINGSIDE_CASTLING or text in QUEENSIDE_CASTLING:
+        king = position.kingSquare[position.sideToMove]
+        move = position.findMove(king, king + 2 if text in KINGSIDE_CASTLING else king - 2)
+        if move is None:
+            raise InvalidSan(san)
+        return move
+
+    match = SAN_PATTERN.fullmatch(text)
+    if match is None:
+        raise InvalidSan(san)
+    letter, fromFile, fromRank, target, promotion = match.groups()
+    kind = PIECE_LETTERS.index(letter.lower()) if letter else PAWN
+    toSquare = parseSquare(target)
+    promotion = PIECE_LETTERS.index(promotion.lower()) if promotion else 0
+    fromFile = ord(fromFile) - 97 if fromFile else -1
+    fromRank = int(fromRank) - 1 if fromRank else -1
+
+    board = position.board
+    found = None
+    for move in position.legalMoves():
+        fromSquare = move & 63
+        if (move >> 6) & 63 != toSquare or move >> 12 != promotion or board[fromSquare] & 7 != kind: continue
+        if fromFile >= 0 and fromSquare & 7 != fromFile: continue
+        if fromRank >= 0 and fromSquare >> 3 != fromRank: continue
+        if found is not None:
+            raise InvalidSan(san)
+        found = move
+    if found is None:
+        raise InvalidSan(san)
+    return found
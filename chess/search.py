@@ -0,0 +1,214 @@
+from time import perf_counter
+from chess.constants import QUEEN
+from chess.position import Position
+from chess.evaluate import evaluate
+from chess.transposition import TranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND
+from chess.ordering import MoveOrderer, MAX_PLY
+from chess.see import staticExchange
+from chess.tablebase import Tablebase, WIN, LOSS
+
+INFINITY = 32000
+MATE_SCORE = 30000
+MAX_DEPTH = 64
+CHECK_EVERY = 1024
+
+class SearchAborted(Exception): pass
+
+def isMateScore(score: int) -> bool:
+    return abs(score) > MATE_SCORE - 1000
+
+# mate scores are stored relative to the node rather than the root so they stay valid at any ply
+def scoreToTable(score: int, ply: int) -> int:
+    if isMateScore(score):
+        return score + ply if score > 0 else score - ply
+    return score
+
+def scoreFromTable(score: int, ply: int) -> int:
+    if isMateScore(score):
+        return score - ply if score > 0 else score + ply
+    return score
+
+def tablebaseScore(wdl: int, moves: int, ply: int) -> int:
+    # a win in n moves mates 2n - 1 plies from here, a loss in n moves is mated after 2n
+    if wdl == WIN:
+        return MATE_SCORE - ply - 2 * moves + 1
+    if wdl == LOSS:
+        return -MATE_SCORE + ply + 2 * moves
+    return 0
+
+class Searcher:
+    def __init__(self, ttSizeMB: float = 16, useOrdering: bool = True, tt: TranspositionTable = None, tablebase: Tablebase = None):
+        # tt lets several searchers, possibly in other processes, work on one shared table
+        self.tt = tt if tt is not None else TranspositionTable(ttSizeMB)
+        self.tablebase = tablebase
+        self.orderer = MoveOrderer()
+        self.useOrdering = useOrdering
+        self.nodes = 0
+        self.deadline = None
+        self.maxNodes = None
+        # (depth, score, bestMove, nodes, seconds) for every finished iteration of the last search
+        self.iterations = []
+
+    def search(self, position: Position, maxTime: float = 1.0, maxDepth: int = MAX_DEPTH, maxNodes: int = None) -> tuple:
+        # returns (bestMove, score, depth) from the deepest iteration that finished inside the budget
+        start = self._startBudget(maxTime, maxNodes)
+        self.iterations = []
+        self.tt.newSearch()
+        self.orderer.newSearch()
+        rootPly = position.ply
+
+        rootMoves = position.legalMoves()
+        if not rootMoves:
+            return None, -MATE_SCORE if position.inCheck() else 0, 0
+        if self.useOrdering:
+            entry = self.tt.probe(position.key)
+            rootMoves = self.orderer.orderMoves(position, rootMoves, entry[0] if entry else 0, 0)
+        bestMove, bestScore, completedDepth = rootMoves[0], 0, 0
+
+        for depth in range(1, maxDepth + 1):
+            try:
+                score, move = self._searchRoot(position, rootMoves, depth)
+            except SearchAborted:
+                while position.ply > rootPly:
+                    position.unmakeMove()
+                break
+            bestMove, bestScore, completedDepth = move, score, depth
+            self.iterations.append((depth, score, move, self.nodes, perf_counter() - start))
+            rootMoves.remove(move)
+            rootMoves.insert(0, move)
+            if isMateScore(score) or len(rootMoves) == 1:
+                break
+        return bestMove, bestScore, completedDepth
+
+    def searchMoves(self, position: Position, moves: list, depth: int, maxTime: float = None, maxNodes: int = None,
+            newSearch: bool = False, alpha: int = -INFINITY) -> tuple:
+        # one fixed-depth iteration over a subset of the root moves, the unit of work in a root-split search;
+        # returns (score, bestMove, nodes), or None when the budget ran out first. A score of alpha or below
+        # only says no move in the subset beats alpha. The caller ages the table, which other searchers may share
+        self._startBudget(maxTime, maxNodes)
+        if newSearch:
+            self.orderer.newSearch()
+        rootPly = position.ply
+        try:
+            # a subset's best is not the root's, so it stays out of the table
+            score, move = self._searchRoot(position, moves, depth, alpha, storeResult=False)
+        except SearchAborted:
+            while position.ply > rootPly:
+                position.unmakeMove()
+            return None
+        return score, move, self.nodes
+
+    def _startBudget(self, maxTime: float, maxNodes: int) -> float:
+        self.nodes = 0
+        start = perf_counter()
+        self.deadline = start + maxTime if maxTime is not None else None
+        self.maxNodes = maxNodes
+        return start
+
+    def _checkBudget(self) -> None:
+        if self.deadline is not None and perf_counter() > self.deadline:
+            raise SearchAborted
+        if self.maxNodes is not None and self.nodes >= self.maxNodes:
+            raise SearchAborted
+
+    def _searchRoot(self, position: Position, rootMoves: list, depth: int, alpha: int = -INFINITY, storeResult: bool = True) -> tuple:
+        beta = INFINITY
+        bestMove = rootMoves[0]
+        for move in rootMoves:
+            position.makeMove(move)
+            score = -self._negamax(position, depth - 1, -beta, -alpha, 1)
+            position.unmakeMove()
+            if score > alpha:
+                alpha, bestMove = score, move
+        if storeResult:
+            self.tt.store(position.key, bestMove, alpha, depth, EXACT)
+        return alpha, bestMove
+
+    def _negamax(self, position: Position, depth: int, alpha: int, beta: int, ply: int) -> int:
+        # a table's answer is exact, so it beats quiescence as well as a deeper search
+        if self.tablebase is not None:
+            result = self.tablebase.probe(position)
+            if result is not None:
+                return tablebaseScore(result[0], result[1], ply)
+        if depth <= 0:
+            return self._quiesce(position, alpha, beta, ply)
+        self.nodes += 1
+        if self.nodes % CHECK_EVERY == 0:
+            self._checkBudget()
+        if position.halfmoveClock >= 100 or position.repetitionCount() > 1:
+            return 0
+
+        ttMove = 0
+        entry = self.tt.probe(position.key)
+        if entry is not None:
+            ttMove = entry[0]
+            if entry[2] >= depth:
+                score, bound = scoreFromTable(entry[1], ply), entry[3]
+                if bound == EXACT or (bound == LOWER_BOUND and score >= beta) or (bound == UPPER_BOUND and score <= alpha):
+                    return score
+
+        moves = position.legalMoves()
+        if not moves:
+            return -MATE_SCORE + ply if position.inCheck() else 0
+        if self.useOrdering:
+            moves = self.orderer.orderMoves(position, moves, ttMove, ply)
+
+        originalAlpha = alpha
+        bestMove = 0
+        bestScore = -INFINITY
+        for move in moves:
+            position.makeMove(move)
+            score = -self._negamax(position, depth - 1, -beta, -alpha, ply + 1)
+            position.unmakeMove()
+            if score > bestScore:
+                bestScore, bestMove = score, move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        if self.useOrdering:
+                            self.orderer.recordCutoff(position, move, depth, ply)
+                        break
+
+        if bestScore >= beta: bound = LOWER_BOUND
+        elif bestScore > originalAlpha: bound = EXACT
+        else: bound = UPPER_BOUND
+        self.tt.store(position.key, bestMove, scoreToTable(bestScore, ply), depth, bound)
+        return bestScore
+
+    def _quiesce(self, position: Position, alpha: int, beta: int, ply: int) -> int:
+        # resolve captures (and every evasion when in check) so leaves are never scored mid-exchange
+        self.nodes += 1
+        if self.nodes % CHECK_EVERY == 0:
+            self._checkBudget()
+
+        inCheck = position.inCheck()
+        if inCheck:
+            moves = position.legalMoves()
+            if not moves:
+                return -MATE_SCORE + ply
+            bestScore = -INFINITY
+        else:
+            bestScore = evaluate(position)
+            if bestScore >= beta or ply >= MAX_PLY:
+                return bestScore
+            if bestScore > alpha:
+                alpha = bestScore
+            moves = [move for move in position.legalCaptures() if move >> 12 in (0, QUEEN)]
+        if ply >= MAX_PLY:
+            return evaluate(position)
+        if self.useOrdering:
+            moves = self.orderer.orderMoves(position, moves, 0, ply)
+
+        for move in moves:
+            if not inCheck and staticExchange(position, move) < 0:
+                continue
+            position.makeMove(move)
+            score = -self._quiesce(position, -beta, -alpha, ply + 1)
+            position.unmakeMove()
+            if score > bestScore:
+                bestScore = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        return bestScore
@@ -0,0 +1,42 @@
+from chess.constants import EMPTY, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING
+from chess.evaluate import PIECE_VALUES
+
+# a king may take last in an exchange but is never given up for material
+SEE_VALUES = PIECE_VALUES[:KING] + [20000]
+
+def staticExchange(position, move: int) -> int:
+    # material balance for the mover after both sides keep recapturing on the target square with
+    # their least valuable attacker, either side free to stop when continuing would lose more
+    board = position.board
+    fromSquare, toSquare, promotion = move & 63, (move >> 6) & 63, move >> 12
+    attacker = board[fromSquare] & 7
+    victim = board[toSquare] & 7
+    occupied = position.occupied ^ (1 << fromSquare)
+    if attacker == PAWN and toSquare == position.epSquare and victim == EMPTY:
+        victim = PAWN
+        occupied ^= 1 << (toSquare - 8 if position.sideToMove == 0 else toSquare + 8)
+
+    gains = [SEE_VALUES[victim]]
+    onSquare = SEE_VALUES[attacker]
+    if promotion:
+        gains[0] += SEE_VALUES[promotion] - SEE_VALUES[PAWN]
+        onSquare = SEE_VALUES[promotion]
+    side = position.sideToMove ^ 1
+
+    while True:
+        attackers = position.attackersOf(toSquare, side, occupied) & occupied
+        if not attackers: break
+        pieces = position.pieces[side]
+        for kind in (PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING):
+            candidates = attackers & pieces[kind]
+            if candidates: break
+        if kind == KING and position.attackersOf(toSquare, side ^ 1, occupied ^ candidates) & occupied:
+            break
+        gains.append(onSquare - gains[-1])
+        onSquare = SEE_VALUES[kind]
+        occupied ^= candidates & -candidates
+        side ^= 1
+
+    for index in range(len(gains) - 1, 0, -1):
+        gains[index - 1] = -max(-gains[index - 1], gains[index])
+    return gains[0]
@@ -0,0 +1,322 @@
+import mmap
+import os
+from chess.constants import WHITE, BLACK, PAWN, PIECE_LETTERS
+from chess.movegen import generateLegalMoves
+from chess.position import Position, makePiece, moveFrom, moveTo, movePromotion
+
+# one byte per position: wdl:2 | dtm:6, the result for the side to move and full moves until mate
+DRAW = 0
+WIN = 1
+LOSS = 2
+UNUSED = 3
+MAX_DTM = 63
+MAX_PIECES = 4
+
+# pieces of each side are listed in this order, in signatures and in the index
+SIGNATURE_ORDER = "KQRBNP"
+PIECE_WORTH = {"K": 0, "Q": 9, "R": 5, "B": 3, "N": 3, "P": 1}
+
+class InvalidSignature(Exception): pass
+class DistanceTooLong(Exception): pass
+
+def _transform(square: int, transpose: bool, flipFile: bool, flipRank: bool) -> int:
+    file, rank = square & 7, square >> 3
+    if transpose: file, rank = rank, file
+    if flipFile: file ^= 7
+    if flipRank: rank ^= 7
+    return rank * 8 + file
+
+# the eight board symmetries as square maps, identity first; pawns only allow the file mirror
+ALL_SYMMETRIES = [[_transform(square, transpose, flipFile, flipRank) for square in range(64)]
+    for transpose in (False, True) for flipFile in (False, True) for flipRank in (False, True)]
+PAWN_SYMMETRIES = [ALL_SYMMETRIES[0], ALL_SYMMETRIES[2]]
+# the white king is always moved into a1-d1-d4, or onto files a-d when pawns are on the board
+TRIANGLE = [square for square in range(64) if (square >> 3) <= (square & 7) <= 3]
+HALF_BOARD = [square for square in range(64) if square & 7 <= 3]
+
+def _strength(letters: str) -> tuple:
+    return sum(PIECE_WORTH[letter] for letter in letters), tuple(-SIGNATURE_ORDER.index(letter) for letter in letters)
+
+def _sideLetters(codes: list, color: int) -> str:
+    return "".join(sorted((PIECE_LETTERS[code & 7].upper() for code in codes if code >> 3 == color), key=SIGNATURE_ORDER.index))
+
+def normalizeSignature(signature: str) -> str:
+    # "KvKR" and "KRvK" name the same table; the stronger side is always listed, and stored, as White
+    sides = signature.upper().split("V")
+    if len(sides) != 2 or any(side.count("K") != 1 or not side.startswith("K") or set(side) - set(SIGNATURE_ORDER) for side in sides):
+        raise InvalidSignature(signature)
+    white, black = ("".join(sorted(side, key=SIGNATURE_ORDER.index)) for side in sides)
+    if _strength(black) > _strength(white):
+        white, black = black, white
+    if len(white) + len(black) > MAX_PIECES:
+        raise InvalidSignature(signature)
+    return white + "v" + black
+
+def tablePath(directory: str, signature: str) -> str:
+    return os.path.join(directory, signature + ".tb")
+
+class TableLayout:
+    # maps positions of one material signature to dense indices: side to move, white king slot, then one
+    # base-64 digit per other piece. Only the smallest index among a position's symmetric images is used
+    def __init__(self, signature: str):
+        self.signature = normalizeSignature(signature)
+        white, black = self.signature.split("v")
+        self.codes = [makePiece(WHITE, PIECE_LETTERS.index(letter.lower())) for letter in white] + \
+            [makePiece(BLACK, PIECE_LETTERS.index(letter.lower())) for letter in black]
+        self.hasPawns = "P" in self.signature
+        self.slotSquares = HALF_BOARD if self.hasPawns else TRIANGLE
+        self.kingSlot = [-1] * 64
+        for slot, square in enumerate(self.slotSquares):
+            self.kingSlot[square] = slot
+        symmetries = PAWN_SYMMETRIES if self.hasPawns else ALL_SYMMETRIES
+        # a king on a diagonal has two images in the triangle, and the position keeps whichever indexes lower
+        self.kingSymmetries = [[symmetry for symmetry in symmetries if self.kingSlot[symmetry[square]] >= 0] for square in range(64)]
+        self.stride = 64 ** (len(self.codes) - 1)
+        self.size = 2 * len(self.slotSquares) * self.stride
+        # identical pieces are interchangeable, so their squares are kept in ascending order
+        self.groups = []
+        start = 1
+        for index in range(2, len(self.codes) + 1):
+            if index == len(self.codes) or self.codes[index] != self.codes[start]:
+                if index - start > 1: self.groups.append((start, index))
+                start = index
+
+    def canonicalIndex(self, squares: list, stm: int) -> int:
+        best = None
+        for symmetry in self.kingSymmetries[squares[0]]:
+            mapped = [symmetry[square] for square in squares]
+            for start, end in self.groups:
+                mapped[start:end] = sorted(mapped[start:end])
+            rest = 0
+            for square in mapped[1:]:
+                rest = rest * 64 + square
+            index = (stm * len(self.slotSquares) + self.kingSlot[mapped[0]]) * self.stride + rest
+            if best is None or index < best:
+                best = index
+        return best
+
+    def decode(self, index: int) -> tuple:
+        top, rest = divmod(index, self.stride)
+        stm, slot = divmod(top, len(self.slotSquares))
+        squares = [0] * len(self.codes)
+        for position in range(len(self.codes) - 1, 0, -1):
+            rest, squares[position] = divmod(rest, 64)
+        squares[0] = self.slotSquares[slot]
+        return squares, stm
+
+    def place(self, position: Position, squares: list, stm: int) -> None:
+        # sets position up with this table's pieces on squares, without castling rights or an en-passant square
+        board = bytearray(64)
+        for code, square in zip(self.codes, squares):
+            board[square] = code
+        position.setBoard(board)
+        position.sideToMove = stm
+
+    def isLegal(self, position: Position, squares: list, stm: int) -> bool:
+        # places the pieces when they fit on the board, then checks that the side not to move is not in check
+        if len(set(squares)) != len(squares):
+            return False
+        for code, square in zip(self.codes, squares):
+            if code & 7 == PAWN and square >> 3 in (0, 7):
+                return False
+        self.place(position, squares, stm)
+        return not position.kingInCheck(stm ^ 1)
+
+    def predecessors(self, position: Position, squares: list, stm: int) -> set:
+        # indices of the positions from which the side not to move reached this one, which position must
+        # hold, by a quiet move; captures and promotions change the material and so never lead back here
+        mover = stm ^ 1
+        occupied = position.occupied
+        king = position.kingSquare[stm]
+        parents = set()
+        for index, code in enumerate(self.codes):
+            if code >> 3 != mover: continue
+            square = squares[index]
+            if code & 7 == PAWN:
+                back = -8 if mover == WHITE else 8
+                origins = 0
+                origin = square + back
+                if not occupied >> origin & 1 and 1 <= origin >> 3 <= 6:
+                    origins |= 1 << origin
+                    if square >> 3 == (3 if mover == WHITE else 4) and not occupied >> (origin + back) & 1:
+                        origins |= 1 << (origin + back)
+            else:
+                # a piece reaches square from wherever it attacks on the way back
+                origins = position.attacksFrom[mover][square] & ~occupied
+            while origins:
+                low = origins & -origins
+                origins ^= low
+                origin = low.bit_length() - 1
+                # the side that did not move may not have been left in check
+                position._move(square, origin, code)
+                inCheck = position.attackersOf(king, mover, position.occupied) != 0
+                position._move(origin, square, code)
+                if inCheck: continue
+                parent = squares[:]
+                parent[index] = origin
+                parents.add(self.canonicalIndex(parent, mover))
+        return parents
+
+def _dependencies(layout: TableLayout) -> set:
+    # the tables reached by a capture or a promotion
+    white, black = layout.signature.split("v")
+    found = set()
+    for side, other, color in ((white, black, WHITE), (black, white, BLACK)):
+        for index in range(1, len(side)):
+            reduced = side[:index] + side[index + 1:]
+            found.add(normalizeSignature(reduced + "v" + other if color == WHITE else other + "v" + reduced))
+            if side[index] == "P":
+                for promotion in "QRBN":
+                    promoted = reduced + promotion
+                    found.add(normalizeSignature(promoted + "v" + other if color == WHITE else other + "v" + promoted))
+    found.discard(layout.signature)
+    return found
+
+def _solve(layout: TableLayout, tablebase: "Tablebase", log=None) -> bytearray:
+    # retrograde analysis: every position first learns the results its captures and promotions lead to, then
+    # results spread backwards one ply at a time. remaining counts the distinct children that are not yet known
+    # wins for the opponent, and a position loses once that reaches zero with no exit that saves it
+    size = layout.size
+    position = Position()
+    values = bytearray(size)
+    remaining = bytearray(size)
+    canLose = bytearray(size)
+    exitLoss = bytearray(size)
+    buckets = [[] for _ in range(2 * MAX_DTM + 2)]
+
+    for index in range(size):
+        squares, stm = layout.decode(index)
+        if layout.canonicalIndex(squares, stm) != index or not layout.isLegal(position, squares, stm):
+            values[index] = UNUSED
+            continue
+        children = set()
+        bestWin = None
+        drawn = False
+        worstLoss = 0
+        moves = generateLegalMoves(position)
+        for move in moves:
+            fromSquare, toSquare = moveFrom(move), moveTo(move)
+            if not position.board[toSquare] and not movePromotion(move):
+                childSquares = squares[:]
+                childSquares[squares.index(fromSquare)] = toSquare
+                children.add(layout.canonicalIndex(childSquares, stm ^ 1))
+                continue
+            position.makeMove(move)
+            wdl, plies = tablebase.probe(position, inPlies=True)
+            position.unmakeMove()
+            if wdl == LOSS:
+                bestWin = plies + 1 if bestWin is None else min(bestWin, plies + 1)
+            elif wdl == DRAW:
+                drawn = True
+            else:
+                worstLoss = max(worstLoss, plies + 1)
+        if not moves:
+            # no legal move at all: checkmate, or stalemate which stays a draw
+            if position.inCheck():
+                buckets[0].append(index << 2 | LOSS)
+            continue
+        remaining[index] = len(children)
+        if bestWin is not None:
+            buckets[bestWin].append(index << 2 | WIN)
+        elif not drawn:
+            canLose[index] = 1
+            exitLoss[index] = worstLoss
+            if not children:
+                buckets[worstLoss].append(index << 2 | LOSS)
+
+    for plies in range(len(buckets)):
+        bucket = buckets[plies]
+        if bucket and (plies + 1) >> 1 > MAX_DTM:
+            raise DistanceTooLong(layout.signature)
+        for item in bucket:
+            index, wdl = item >> 2, item & 3
+            if values[index]: continue
+            values[index] = wdl | ((plies + 1) >> 1) << 2
+            squares, stm = layout.decode(index)
+            layout.place(position, squares, stm)
+            for parent in layout.predecessors(position, squares, stm):
+                if values[parent]: continue
+                if wdl == LOSS:
+                    buckets[plies + 1].append(parent << 2 | WIN)
+                else:
+                    remaining[parent] -= 1
+                    if remaining[parent] == 0 and canLose[parent]:
+                        buckets[max(plies + 1, exitLoss[parent])].append(parent << 2 | LOSS)
+        buckets[plies] = None
+        if log is not None and bucket:
+            log("%s  %3d plies  %7d positions" % (layout.signature, plies, len(bucket)))
+    return values
+
+def generateTable(signature: str, directory: str, log=None) -> str:
+    # writes the table for signature, and first every table its captures and promotions lead to; returns its path
+    layout = TableLayout(signature)
+    path = tablePath(directory, layout.signature)
+    if os.path.exists(path):
+        return path
+    for dependency in sorted(_dependencies(layout)):
+        generateTable(dependency, directory, log)
+    os.makedirs(directory, exist_ok=True)
+    tablebase = Tablebase(directory)
+    try:
+        values = _solve(layout, tablebase, log)
+    finally:
+        tablebase.close()
+    with open(path + ".tmp", "wb") as out:
+        out.write(values)
+    os.replace(path + ".tmp", path)
+    return path
+
+class Tablebase:
+    # reads tables straight from their mapped files, so a probe is a single byte lookup
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.tables = {}
+
+    def close(self) -> None:
+        for table in self.tables.values():
+            if table is not None: table[1].close()
+        self.tables = {}
+
+    def _table(self, signature: str) -> tuple:
+        if signature not in self.tables:
+            path = tablePath(self.directory, signature)
+            table = None
+            if os.path.exists(path):
+                with open(path, "rb") as file:
+                    table = (TableLayout(signature), mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+            self.tables[signature] = table
+        return self.tables[signature]
+
+    def probePieces(self, codes: list, squares: list, stm: int, inPlies: bool = False) -> tuple:
+        # (wdl, distance) for the side to move, distance in full moves to mate or, with inPlies, in plies;
+        # None when no table covers this material or the position is illegal
+        white, black = _sideLetters(codes, WHITE), _sideLetters(codes, BLACK)
+        if _strength(black) > _strength(white):
+            white, black = black, white
+            codes = [code ^ 8 for code in codes]
+            squares = [square ^ 56 for square in squares]
+            stm ^= 1
+        table = self._table(white + "v" + black)
+        if table is None:
+            return None
+        layout, memory = table
+        ordered = sorted(zip(codes, squares), key=lambda piece: (piece[0] >> 3, SIGNATURE_ORDER.index(PIECE_LETTERS[piece[0] & 7].upper())))
+        value = memory[layout.canonicalIndex([square for _, square in ordered], stm)]
+        wdl, moves = value & 3, value >> 2
+        if wdl == UNUSED:
+            return None
+        if not inPlies or wdl == DRAW:
+            return wdl, moves
+        return wdl, 2 * moves - 1 if wdl == WIN else 2 * moves
+
+    def probe(self, position: Position, inPlies: bool = False) -> tuple:
+        # (wdl, distance to mate) for the side to move, as probePieces gives it, or None for positions no table covers.
+        # Tables have no en passant, so neither do they cover a position where it is available
+        if position.castling or position._epKey() or bin(position.occupied).count("1") > MAX_PIECES:
+            return None
+        codes, squares = [], []
+        for square in range(64):
+            if position.board[square]:
+                codes.append(position.board[square])
+                squares.append(square)
+        return self.probePieces(codes, squares, position.sideToMove, inPlies)
@@ -0,0 +1,86 @@
+NORTH = 0
+EAST = 1
+NORTH_EAST = 2
+NORTH_WEST = 3
+SOUTH = 4
+WEST = 5
+SOUTH_WEST = 6
+SOUTH_EAST = 7
+
+# directions 0-3 walk towards higher square indices, 4-7 towards lower ones
+DIRECTION_DELTAS = ((0, 1), (1, 0), (1, 1), (-1, 1), (0, -1), (-1, 0), (-1, -1), (1, -1))
+ROOK_DIRECTIONS = (NORTH, EAST, SOUTH, WEST)
+BISHOP_DIRECTIONS = (NORTH_EAST, NORTH_WEST, SOUTH_WEST, SOUTH_EAST)
+KNIGHT_DELTAS = ((1, 2), (-1, 2), (1, -2), (-1, -2), (-2, 1), (-2, -1), (2, 1), (2, -1))
+
+def _targets(square: int, deltas: tuple) -> tuple:
+    file, rank = square & 7, square >> 3
+    return tuple((rank + dr) * 8 + file + df for df, dr in deltas if 0 <= file + df < 8 and 0 <= rank + dr < 8)
+
+def _ray(square: int, direction: int) -> tuple:
+    df, dr = DIRECTION_DELTAS[direction]
+    file, rank = (square & 7) + df, (square >> 3) + dr
+    ray = []
+    while 0 <= file < 8 and 0 <= rank < 8:
+        ray.append(rank * 8 + file)
+        file += df
+        rank += dr
+    return tuple(ray)
+
+def _mask(targets: tuple) -> int:
+    mask = 0
+    for square in targets:
+        mask |= 1 << square
+    return mask
+
+KNIGHT_TARGETS = [_targets(square, KNIGHT_DELTAS) for square in range(64)]
+KING_TARGETS = [_targets(square, DIRECTION_DELTAS) for square in range(64)]
+# RAYS[square][direction] lists the squares walked from square, nearest first
+RAYS = [[_ray(square, direction) for direction in range(8)] for square in range(64)]
+
+KNIGHT_ATTACKS = [_mask(targets) for targets in KNIGHT_TARGETS]
+KING_ATTACKS = [_mask(targets) for targets in KING_TARGETS]
+RAY_MASKS = [[_mask(ray) for ray in rays] for rays in RAYS]
+PAWN_ATTACKS = [[_mask(_targets(square, ((-1, 1), (1, 1)))) for square in range(64)],
+    [_mask(_targets(square, ((-1, -1), (1, -1)))) for square in range(64)]]
+BISHOP_MASKS = [masks[NORTH_EAST] | masks[NORTH_WEST] | masks[SOUTH_WEST] | masks[SOUTH_EAST] for masks in RAY_MASKS]
+ROOK_MASKS = [masks[NORTH] | masks[EAST] | masks[SOUTH] | masks[WEST] for masks in RAY_MASKS]
+
+# BETWEEN[a][b] holds the squares strictly between two aligned squares, LINE[a][b] the whole line through both
+BETWEEN = [[0] * 64 for _ in range(64)]
+LINE = [[0] * 64 for _ in range(64)]
+for _square in range(64):
+    for _direction in range(8):
+        _line = RAY_MASKS[_square][_direction] | RAY_MASKS[_square][(_direction + 4) % 8] | 1 << _square
+        _between = 0
+        for _target in RAYS[_square][_direction]:
+            BETWEEN[_square][_target] = _between
+            LINE[_square][_target] = _line
+            _between |= 1 << _target
+
+def bishopAttacksFrom(square: int, occupied: int) -> int:
+    rays = RAY_MASKS[square]
+    attacks = 0
+    for direction in BISHOP_DIRECTIONS:
+        ray = rays[direction]
+        blockers = ray & occupied
+        if blockers:
+            blocker = (blockers & -blockers).bit_length() - 1 if direction < 4 else blockers.bit_length() - 1
+            ray ^= RAY_MASKS[blocker][direction]
+        attacks |= ray
+    return attacks
+
+def rookAttacksFrom(square: int, occupied: int) -> int:
+    rays = RAY_MASKS[square]
+    attacks = 0
+    for direction in ROOK_DIRECTIONS:
+        ray = rays[direction]
+        blockers = ray & occupied
+        if blockers:
+            blocker = (blockers & -blockers).bit_length() - 1 if direction < 4 else blockers.bit_length() - 1
+            ray ^= RAY_MASKS[blocker][direction]
+        attacks |= ray
+    return attacks
+
+def queenAttacksFrom(square: int, occupied: int) -> int:
+    return bishopAttacksFrom(square, occupied) | rookAttacksFrom(square, occupied)
@@ -0,0 +1,108 @@
+from array import array
+from multiprocessing.shared_memory import SharedMemory
+
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+ENTRY_BYTES = 16
+BUCKET_ENTRIES = 4
+MAX_AGE = 64
+
+class TableTooSmall(Exception): pass
+
+def packEntry(move: int, score: int, depth: int, bound: int, age: int) -> int:
+    return move | (score + 32768) << 16 | depth << 32 | bound << 40 | age << 42
+
+def unpackEntry(data: int) -> tuple:
+    return data & 0xFFFF, ((data >> 16) & 0xFFFF) - 32768, (data >> 32) & 0xFF, (data >> 40) & 3
+
+class TranspositionTable:
+    # entries live as (key ^ data, data) pairs of 64-bit words in one flat array, four entries per bucket;
+    # data packs move:16 | score + 32768:16 | depth:8 | bound:2 | age:6. Storing the key xor the data means
+    # an entry torn by two processes writing at once no longer matches its key and simply reads as a miss,
+    # so a table in shared memory needs no locks
+    def __init__(self, sizeMB: float = 16, shared: bool = False, name: str = None):
+        # shared=True creates a block other processes can attach to by passing its name with the same sizeMB
+        self.bucketCount = int(sizeMB * 1024 * 1024) // (ENTRY_BYTES * BUCKET_ENTRIES)
+        if self.bucketCount < 1:
+            raise TableTooSmall
+        words = self.bucketCount * BUCKET_ENTRIES * 2
+        self.memory = None
+        self.owner = False
+        if shared or name is not None:
+            if name is None:
+                self.memory = SharedMemory(create=True, size=words * 8)
+                self.owner = True
+            else:
+                self.memory = SharedMemory(name=name)
+            self.table = self.memory.buf[:words * 8].cast("Q")
+        else:
+            self.table = array("Q", [0]) * words
+        self.age = 0
+
+    @property
+    def name(self) -> str:
+        return self.memory.name if self.memory is not None else None
+
+    def close(self) -> None:
+        # detaches from a shared table, and frees it if this table created it
+        if self.memory is None: return
+        self.table.release()
+        self.table = None
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+        self.memory = None
+
+    def sizeBytes(self) -> int:
+        return len(self.table) * self.table.itemsize
+
+    def newSearch(self) -> None:
+        self.age = (self.age + 1) % MAX_AGE
+
+    def clear(self) -> None:
+        view = memoryview(self.table)
+        zeros = array("Q", [0]) * min(len(view), 1 << 16)
+        for start in range(0, len(view), len(zeros)):
+            end = min(start + len(zeros), len(view))
+            view[start:end] = zeros[:end - start]
+        self.age = 0
+
+    def probe(self, key: int) -> tuple:
+        table = self.table
+        index = (key % self.bucketCount) * BUCKET_ENTRIES * 2
+        for slot in range(index, index + BUCKET_ENTRIES * 2, 2):
+            data = table[slot + 1]
+            if data and table[slot] ^ data == key:
+                return unpackEntry(data)
+        return None
+
+    def store(self, key: int, move: int, score: int, depth: int, bound: int) -> None:
+        table = self.table
+        age = self.age
+        score = max(-32767, min(32767, score))
+        depth = max(0, min(255, depth))
+        index = (key % self.bucketCount) * BUCKET_ENTRIES * 2
+        victim = index
+        victimWorth = None
+        for slot in range(index, index + BUCKET_ENTRIES * 2, 2):
+            data = table[slot + 1]
+            if data == 0 or table[slot] ^ data == key:
+                if data and move == 0:
+                    move = data & 0xFFFF
+                victim = slot
+                break
+            # keep deep entries from the current search, evict shallow or stale ones first
+            worth = ((data >> 32) & 0xFF) - 8 * ((age - (data >> 42)) % MAX_AGE)
+            if victimWorth is None or worth < victimWorth:
+                victim, victimWorth = slot, worth
+        data = packEntry(move, score, depth, bound, age)
+        table[victim] = key ^ data
+        table[victim + 1] = data
+
+    def hashfull(self) -> int:
+        table = self.table
+        sample = min(1000, self.bucketCount * BUCKET_ENTRIES)
+        used = sum(1 for slot in range(0, sample * 2, 2) if table[slot + 1] and (table[slot + 1] >> 42) == self.age)
+        return used * 1000 // sample
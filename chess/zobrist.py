@@ -0,0 +1,11 @@
+from random import Random
+
+_random = Random(0x5EED)
+
+# PIECE_KEYS is indexed by the piece code (pieceType | color << 3), so empty and unused codes stay zero
+PIECE_KEYS = [[0] * 64 for _ in range(15)]
+for _piece in (1, 2, 3, 4, 5, 6, 9, 10, 11, 12, 13, 14):
+    PIECE_KEYS[_piece] = [_random.getrandbits(64) for _ in range(64)]
+CASTLING_KEYS = [_random.getrandbits(64) for _ in range(16)]
+EP_FILE_KEYS = [_random.getrandbits(64) for _ in range(8)]
+SIDE_KEY = _random.getrandbits(64)